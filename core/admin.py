@@ -1,3 +1,55 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db.models import Count, Q
 
-# Register your models here.
+from .models import Order, OrderItem
+from .orders import BLOCKED, TRANSITIONS, transition
+
+
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    fields = ("service", "quantity", "price_at_purchase", "slot")
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "status", "payment_status", "total_amount", "service_date", "created_at")
+    list_filter = ("status", "payment_status", "service_date")
+    search_fields = ("=id", "tran_id", "user__username", "email")
+    list_select_related = ("user",)
+    show_full_result_count = False
+    inlines = [OrderItemInline]
+    # status changes go through the actions, which release capacity and keep updated_at current
+    readonly_fields = (
+        "user", "status", "payment_status", "total_amount", "tran_id", "service_date", "capacity_held",
+        "created_at", "updated_at",
+    )
+    actions = ["mark_completed", "mark_cancelled"]
+
+    @admin.action(description="Mark selected pending orders as completed")
+    def mark_completed(self, request, queryset):
+        self._transition(request, queryset, "completed")
+
+    @admin.action(description="Cancel selected pending orders")
+    def mark_cancelled(self, request, queryset):
+        self._transition(request, queryset, "cancelled")
+
+    def _transition(self, request, queryset, status):
+        changed = transition(queryset, status)
+        sources = [old for old, targets in TRANSITIONS.items() if status in targets]
+        reasons = {"unmovable": Count("pk", filter=~Q(status__in=sources))}
+        if status in BLOCKED:
+            reasons["blocked"] = Count("pk", filter=Q(status__in=sources) & BLOCKED[status][0])
+        skipped = queryset.exclude(pk__in=changed).aggregate(**reasons)
+        self.message_user(request, f"{len(changed)} order(s) marked as {status}.", messages.SUCCESS)
+        if skipped["unmovable"]:
+            self.message_user(request, f"{skipped['unmovable']} order(s) were not {' or '.join(sources)} "
+                                       f"and were left unchanged.", messages.WARNING)
+        if skipped.get("blocked"):
+            self.message_user(request, f"{skipped['blocked']} order(s) {BLOCKED[status][1]} "
+                                       f"and were left unchanged.", messages.WARNING)
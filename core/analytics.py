@@ -0,0 +1,186 @@
+# core/analytics.py
+from datetime import datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import DailySales, DailyServiceSales, Order, OrderItem
+from .totals import order_line_total
+
+ZERO = Value(0, output_field=DecimalField())
+
+
+def order_day(order):
+    return timezone.localdate(order.created_at)
+
+
+def _upsert(model, keys, deltas):
+    """
+    INSERT the row, or add ``deltas`` to the existing one, in one statement. A
+    negative delta only ever applies to an existing row, and the inserted values
+    are clamped to zero so they pass the non-negative CHECKs.
+    """
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    columns = [*keys, *deltas]
+    sql = (
+        f"INSERT INTO {table} ({', '.join(qn(c) for c in columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+        f"ON CONFLICT ({', '.join(qn(c) for c in keys)}) DO UPDATE SET "
+        + ", ".join(f"{qn(c)} = {table}.{qn(c)} + %s" for c in deltas)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*keys.values(), *(max(d, 0) for d in deltas.values()), *deltas.values()])
+
+
+def _add_order_lines(order, day, sign):
+    """Add (``sign=1``) or remove (``sign=-1``) the order's lines from the per-service rollup."""
+    if sign < 0:
+        return _remove_order_lines(order, day)
+    qn = connection.ops.quote_name
+    table = qn(DailyServiceSales._meta.db_table)
+    sums = ("quantity", "revenue", "orders")
+    # the WHERE clause keeps SQLite from reading ON CONFLICT as a join constraint
+    sql = (
+        f"INSERT INTO {table} ({qn('day')}, {qn('service_id')}, {', '.join(qn(c) for c in sums)}) "
+        f"SELECT %s, {qn('service_id')}, SUM({qn('quantity')}), SUM({qn('quantity')} * {qn('price_at_purchase')}), 1 "
+        f"FROM {qn(OrderItem._meta.db_table)} WHERE {qn('order_id')} = %s GROUP BY {qn('service_id')} "
+        f"ON CONFLICT ({qn('day')}, {qn('service_id')}) DO UPDATE SET "
+        + ", ".join(f"{qn(c)} = {table}.{qn(c)} + excluded.{qn(c)}" for c in sums)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [connection.ops.adapt_datefield_value(day), order.pk])
+
+
+def _remove_order_lines(order, day):
+    """
+    Subtract the order's lines from the rows ``_add_order_lines`` added them to.
+    A plain UPDATE: an INSERT of the negative sums would fail the non-negative
+    CHECKs before ON CONFLICT is considered.
+    """
+    lines = OrderItem.objects.filter(order=order, service_id=OuterRef("service_id")).order_by().values("service_id")
+    DailyServiceSales.objects.filter(
+        day=day, service_id__in=OrderItem.objects.filter(order=order).values("service_id")
+    ).update(
+        quantity=F("quantity") - Subquery(lines.annotate(total=Sum("quantity")).values("total")),
+        revenue=F("revenue") - Subquery(lines.annotate(total=Sum(order_line_total())).values("total")),
+        orders=F("orders") - 1,
+    )
+
+
+def order_placed(order):
+    _upsert(DailySales, {"day": connection.ops.adapt_datefield_value(order_day(order))},
+            {"orders": 1, "paid": 0, "failed": 0, "revenue": 0})
+
+
+@transaction.atomic
+def payment_changed(order, old_status, old_total=None):
+    """
+    Move ``order`` from ``old_status`` (and ``old_total``) to its current
+    payment status and total in the rollups. Call it in the transaction
+    that changed the order.
+    """
+    old_total = order.total_amount if old_total is None else old_total
+    new_status, new_total = order.payment_status, order.total_amount
+    if (old_status, old_total) == (new_status, new_total):
+        return
+    day = order_day(order)
+    deltas = {
+        "orders": 0,
+        "paid": (new_status == "paid") - (old_status == "paid"),
+        "failed": (new_status == "failed") - (old_status == "failed"),
+        "revenue": (new_total if new_status == "paid" else 0) - (old_total if old_status == "paid" else 0),
+    }
+    _upsert(DailySales, {"day": connection.ops.adapt_datefield_value(day)}, deltas)
+    if deltas["paid"]:
+        _add_order_lines(order, day, deltas["paid"])
+
+
+def _day_bounds(start, end, field="created_at"):
+    """Range filter on the raw timestamp (index friendly) for the local days ``start``..``end``."""
+    tz = timezone.get_current_timezone()
+    q = Q()
+    if start is not None:
+        q &= Q(**{f"{field}__gte": timezone.make_aware(datetime.combine(start, time.min), tz)})
+    if end is not None:
+        q &= Q(**{f"{field}__lt": timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz)})
+    return q
+
+
+@transaction.atomic
+def rebuild_rollups(start=None, end=None, batch_size=1000):
+    """Recompute both rollups for the days ``start``..``end`` (inclusive, open when None) from the orders."""
+    days = Q()
+    if start is not None:
+        days &= Q(day__gte=start)
+    if end is not None:
+        days &= Q(day__lte=end)
+    DailySales.objects.filter(days).delete()
+    DailyServiceSales.objects.filter(days).delete()
+
+    paid = Q(payment_status="paid")
+    daily = Order.objects.filter(_day_bounds(start, end)).annotate(day=TruncDate("created_at")).order_by().values(
+        "day"
+    ).annotate(
+        orders=Count("id"),
+        paid=Count("id", filter=paid),
+        failed=Count("id", filter=Q(payment_status="failed")),
+        revenue=Coalesce(Sum("total_amount", filter=paid), ZERO),
+    )
+    DailySales.objects.bulk_create((DailySales(**row) for row in daily), batch_size=batch_size)
+
+    lines = OrderItem.objects.filter(
+        _day_bounds(start, end, "order__created_at"), order__payment_status="paid"
+    ).annotate(day=TruncDate("order__created_at")).order_by().values("day", "service_id").annotate(
+        total_quantity=Sum("quantity"),
+        total_revenue=Sum(order_line_total()),
+        total_orders=Count("order_id", distinct=True),
+    )
+    DailyServiceSales.objects.bulk_create(
+        (DailyServiceSales(day=row["day"], service_id=row["service_id"], quantity=row["total_quantity"],
+                           revenue=row["total_revenue"], orders=row["total_orders"]) for row in lines.iterator()),
+        batch_size=batch_size,
+    )
+    return DailySales.objects.filter(days).count()
+
+
+def rebuild_orders(orders):
+    """Rebuild the rollups for the days covered by ``orders``."""
+    created = orders.order_by().values_list("created_at", flat=True)
+    first, last = created.order_by("created_at").first(), created.order_by("-created_at").first()
+    if first is not None:
+        rebuild_rollups(timezone.localdate(first), timezone.localdate(last))
+
+
+# ---------------- Reports ----------------
+def sales_report(start, end, top=10):
+    """Daily series, range totals and top services for ``start``..``end``, read from the rollups only."""
+    rows = {row.day: row for row in DailySales.objects.filter(day__range=(start, end))}
+    daily, totals = [], {"orders": 0, "paid": 0, "failed": 0, "revenue": 0}
+    day = start
+    while day <= end:
+        row = rows.get(day) or DailySales(day=day)
+        daily.append({"day": day, "orders": row.orders, "paid": row.paid, "failed": row.failed, "revenue": row.revenue})
+        for key in totals:
+            totals[key] += getattr(row, key)
+        day += timedelta(days=1)
+    totals["pending"] = totals["orders"] - totals["paid"] - totals["failed"]
+    totals["conversion"] = round(totals["paid"] / totals["orders"], 4) if totals["orders"] else None
+
+    top_services = DailyServiceSales.objects.filter(day__range=(start, end)).values(
+        "service_id", name=F("service__name")
+    ).annotate(
+        quantity_sold=Sum("quantity"), revenue_total=Sum("revenue"), order_count=Sum("orders"),
+    ).order_by("-revenue_total", "service_id")[:top]
+    return {
+        "start": start,
+        "end": end,
+        "totals": totals,
+        "daily": daily,
+        "top_services": [
+            {"service_id": row["service_id"], "name": row["name"], "quantity": row["quantity_sold"],
+             "revenue": row["revenue_total"], "orders": row["order_count"]}
+            for row in top_services
+        ],
+    }
@@ -0,0 +1,105 @@
+# core/async_views.py
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db.models import Count, Max
+from django.http import Http404
+from rest_framework.response import Response
+
+from .facets import afacet_counts
+from .views import CartViewSet, OrderViewSet, ServiceViewSet
+
+
+class AsyncViewSetMixin:
+    """
+    Runs a DRF viewset on the event loop (DRF 3.16 has no async views).
+
+    ``dispatch`` is a coroutine. Authentication, permissions and throttles
+    run through ``sync_to_async``, because the JWT user lookup can hit the
+    database. Actions defined as ``async def`` are awaited, and the rest run
+    in the request's sync thread, so unported actions keep working. ``list``
+    and ``retrieve`` fetch with the async ORM; serializing the loaded rows
+    is plain CPU work and stays on the loop.
+    """
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        return markcoroutinefunction(super().as_view(*args, **kwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.paginator is not None:
+            page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+            if page is not None:
+                return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer([row async for row in queryset], many=True).data)
+
+    async def retrieve(self, request, *args, **kwargs):
+        return Response(self.get_serializer(await self.aget_object()).data)
+
+    async def aget_object(self):
+        """``get_object`` with the async ORM."""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+
+class AsyncServiceViewSet(AsyncViewSetMixin, ServiceViewSet):
+    """ServiceViewSet with async list/retrieve; the catalog cache and ETags work as in the sync view."""
+
+    async def list(self, request, *args, **kwargs):
+        async def render():
+            response = await super(AsyncServiceViewSet, self).list(request, *args, **kwargs)
+            if self.request.query_params.get("facets") in ("1", "true"):
+                response.data["facets"] = await afacet_counts(self.facet_queryset, self.facet_filters)
+            return response
+        return await self._aconditional(request, lambda: self._acached(request, render), *args, **kwargs)
+
+    async def retrieve(self, request, *args, **kwargs):
+        render = lambda: super(AsyncServiceViewSet, self).retrieve(request, *args, **kwargs)
+        return await self._aconditional(request, lambda: self._acached(request, render), *args, **kwargs)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)  # facets are added by list()
+
+
+class AsyncOrderViewSet(AsyncViewSetMixin, OrderViewSet):
+    async def aget_validators(self, request, *args, **kwargs):
+        orders = self._validator_orders(kwargs)
+        return self._validators(await orders.aaggregate(count=Count("id"), modified=Max("updated_at")))
+
+    async def list(self, request, *args, **kwargs):
+        render = lambda: super(AsyncOrderViewSet, self).list(request, *args, **kwargs)
+        return await self._aconditional(request, render, *args, **kwargs)
+
+    async def retrieve(self, request, *args, **kwargs):
+        render = lambda: super(AsyncOrderViewSet, self).retrieve(request, *args, **kwargs)
+        return await self._aconditional(request, render, *args, **kwargs)
+
+
+class AsyncCartViewSet(AsyncViewSetMixin, CartViewSet):
+    pass
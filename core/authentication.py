@@ -0,0 +1,78 @@
+# core/authentication.py
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+
+class UserCache:
+    """Small per-process LRU of users keyed by id, with a short TTL to bound staleness across workers."""
+
+    def __init__(self, ttl, max_size):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None
+            expires, user = entry
+            if expires < time.monotonic():
+                del self._users[user_id]
+                return None
+            self._users.move_to_end(user_id)
+        # callers get their own instance so per-request changes never leak between requests
+        return copy.copy(user)
+
+    def set(self, user_id, user):
+        with self._lock:
+            self._users[user_id] = (time.monotonic() + self.ttl, copy.copy(user))
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_size:
+                self._users.popitem(last=False)
+
+    def forget(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache(
+    ttl=getattr(settings, "JWT_USER_CACHE_TTL", 30),
+    max_size=getattr(settings, "JWT_USER_CACHE_SIZE", 10000),
+)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    simplejwt authentication that skips the users-table lookup for recently seen users.
+
+    The signature and expiry of every token are still checked; only the
+    ``get_user`` query is served from ``user_cache``.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(jwt_settings.USER_ID_CLAIM)
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+        return user
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def _forget_changed_user(sender, instance, **kwargs):
+    user_cache.forget(str(instance.pk))  # simplejwt stores the id claim as a string
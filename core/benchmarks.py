@@ -0,0 +1,391 @@
+# core/benchmarks.py
+import json
+import re
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .analytics import rebuild_rollups
+from .models import Order, OrderItem, Review, Service
+from .ratings import rebuild_ratings
+
+BUDGETS_PATH = Path(__file__).with_name("benchmark_budgets.json")
+
+# synthetic dataset sizes; "full" is the production-sized target
+SCALES = {
+    "tiny": {"users": 20, "services": 50, "reviews": 500, "orders": 200},
+    "small": {"users": 200, "services": 1_000, "reviews": 50_000, "orders": 10_000},
+    "full": {"users": 1_000, "services": 10_000, "reviews": 1_000_000, "orders": 100_000},
+}
+BENCH_PASSWORD = "bench-password-123"
+# service names combine these, so each pair matches 1% of the catalog in search benchmarks
+KINDS = ("cleaning", "plumbing", "electrical", "painting", "gardening", "moving", "repair", "pest", "laundry", "cooking")
+AREAS = ("kitchen", "bathroom", "garden", "office", "roof", "garage", "bedroom", "balcony", "basement", "stairs")
+
+
+@contextmanager
+def isolated_database(verbosity=0):
+    """Run a benchmark against a throwaway test database instead of the configured one."""
+    runner = DiscoverRunner(verbosity=verbosity, interactive=False)
+    runner.setup_test_environment()
+    old_config = runner.setup_databases()
+    try:
+        yield
+    finally:
+        runner.teardown_databases(old_config)
+        runner.teardown_test_environment()
+
+
+def measure(fn, repeat):
+    """Call ``fn`` ``repeat`` times; return latency percentiles (ms) and queries per call."""
+    timings = []
+    with CaptureQueriesContext(connection) as ctx:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "p50_ms": statistics.median(timings),
+        "p99_ms": timings[max(int(len(timings) * 0.99) - 1, 0)],
+        "queries": len(ctx.captured_queries) / repeat,
+    }
+
+
+# ---------------- Synthetic dataset ----------------
+def _insert_series(model, count, columns):
+    """
+    INSERT ``count`` rows generated in the database from a recursive counter ``n``.
+
+    ``columns`` maps column names to SQL expressions over ``n`` (and ``%s``
+    placeholders, passed in order as the following values; literal ``%`` is ``%%``).
+    """
+    names, expressions, params = [], [], []
+    for name, expression in columns.items():
+        if isinstance(expression, tuple):
+            expression, *values = expression
+            params += values
+        names.append(connection.ops.quote_name(name))
+        expressions.append(expression)
+    sql = (
+        "WITH RECURSIVE seq(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM seq WHERE n + 1 < %s) "
+        f"INSERT INTO {connection.ops.quote_name(model._meta.db_table)} ({', '.join(names)}) "
+        f"SELECT {', '.join(expressions)} FROM seq"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [count, *params])
+
+
+def _contiguous_ids(objs):
+    ids = [obj.pk for obj in objs]
+    assert ids == list(range(ids[0], ids[0] + len(ids))), "seeding expects an otherwise idle database"
+    return ids[0]
+
+
+@transaction.atomic
+def seed(users, services, reviews, orders):
+    """
+    Deterministic dataset: ``users`` clients (``bench0``...), ``services``
+    services, ``reviews`` reviews spread over all of them and ``orders`` paid
+    single-line orders spread over the users. Returns the users.
+    """
+    User = get_user_model()
+    password = make_password(BENCH_PASSWORD)
+    people = User.objects.bulk_create(User(username=f"bench{i}", password=password) for i in range(users))
+    catalog = Service.objects.bulk_create(
+        Service(
+            name=f"{KINDS[i % 10].title()} {AREAS[i // 10 % 10]} {i:05d}",
+            description=f"Synthetic {KINDS[i // 100 % 10]} service for the {AREAS[i // 1000 % 10]}",
+            category=Service.CATEGORY_CHOICES[i // 7 % len(Service.CATEGORY_CHOICES)][0],
+            price=Decimal(10 + i % 490),
+        )
+        for i in range(services)
+    )
+    first_user, first_service = _contiguous_ids(people), _contiguous_ids(catalog)
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+
+    _insert_series(Review, reviews, {
+        "user_id": (f"%s + n %% {users}", first_user),
+        "service_id": (f"%s + (n * 7919) %% {services}", first_service),
+        "rating": "1 + (n * 31) %% 5",
+        "comment": "''",
+        "created_at": ("%s", now),
+    })
+    rebuild_ratings()
+
+    last_order = Order.objects.order_by("-id").values_list("id", flat=True).first() or 0
+    _insert_series(Order, orders, {
+        "user_id": (f"%s + n %% {users}", first_user),
+        "name": "'Bench Customer'",
+        "email": "'bench@example.com'",
+        "phone": "'01700000000'",
+        "address": "'Dhaka'",
+        "status": "'completed'",
+        "payment_status": "'paid'",
+        "total_amount": "10 + n %% 490",
+        "capacity_held": "FALSE",
+        "created_at": ("%s", now),
+        "updated_at": ("%s", now),
+    })
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {OrderItem._meta.db_table} (order_id, service_id, quantity, price_at_purchase) "
+            f"SELECT id, %s + id %% {services}, 1, total_amount FROM {Order._meta.db_table} WHERE id > %s",
+            [first_service, last_order],
+        )
+    rebuild_rollups()
+    return people
+
+
+# ---------------- API scenarios ----------------
+class Scenario:
+    """
+    One benchmarked endpoint. ``prepare`` runs untimed before each request
+    (e.g. filling the cart before a checkout); ``request`` returns
+    ``(method, path, data)`` for call ``i``.
+    """
+    view = None  # URL name, also the label in core.metrics
+    expect = 200
+
+    def __init__(self, services, orders):
+        self.services = services  # ids
+        self.orders = orders  # {username: [order ids]}
+
+    def prepare(self, session, user, i):
+        pass
+
+    def request(self, user, i):
+        raise NotImplementedError
+
+
+class CatalogList(Scenario):
+    """Service list with a cold catalog cache: the unique query string misses the cache every time."""
+    view = "service-list"
+
+    def request(self, user, i):
+        return "GET", f"{reverse(self.view)}?ordering=-rating&cache_buster={time.time_ns()}", None
+
+
+class CatalogListCached(Scenario):
+    view = "service-list"
+
+    def request(self, user, i):
+        return "GET", f"{reverse(self.view)}?ordering=-rating", None
+
+
+class CatalogFacets(Scenario):
+    """Filtered service list with facet counts, uncached: one page query plus one aggregate."""
+    view = "service-list"
+
+    def request(self, user, i):
+        category = Service.CATEGORY_CHOICES[i % len(Service.CATEGORY_CHOICES)][0]
+        return "GET", (f"{reverse(self.view)}?category={category}&min_price=50&min_rating=2&facets=1"
+                       f"&cache_buster={time.time_ns()}"), None
+
+
+class CatalogSearch(Scenario):
+    """Full-text search for a term pair matching 1% of the catalog, uncached."""
+    view = "service-search"
+
+    def request(self, user, i):
+        kind, area = KINDS[i % 10], AREAS[i // 10 % 10]
+        return "GET", f"{reverse(self.view)}?q={kind}+{area}&cache_buster={time.time_ns()}", None
+
+
+class CatalogAutocomplete(Scenario):
+    view = "service-autocomplete"
+
+    def request(self, user, i):
+        return "GET", f"{reverse(self.view)}?q={KINDS[i % 10][:3]}&cache_buster={time.time_ns()}", None
+
+
+class CartAdd(Scenario):
+    view = "add-to-cart"
+
+    def request(self, user, i):
+        return "POST", reverse(self.view, args=[self.services[i % len(self.services)]]), None
+
+
+class Checkout(Scenario):
+    view = "checkout"
+    expect = 201
+
+    def prepare(self, session, user, i):
+        session.call("POST", reverse("cart-batch"), {"operations": [
+            {"service_id": self.services[(i + k) % len(self.services)], "delta": 1} for k in range(3)
+        ]})
+
+    def request(self, user, i):
+        return "POST", reverse(self.view), None
+
+
+class OrderList(Scenario):
+    view = "orders-list"
+
+    def request(self, user, i):
+        return "GET", reverse(self.view), None
+
+
+class Payment(Scenario):
+    view = "payment"
+
+    def request(self, user, i):
+        orders = self.orders[user]
+        return "POST", reverse(self.view), {"order_id": orders[i % len(orders)], "payment_method": "bkash"}
+
+
+class PaymentIPN(Scenario):
+    """Gateway IPN callback: stored for the payment worker and acknowledged."""
+    view = "payment-ipn"
+
+    def request(self, user, i):
+        return "POST", reverse(self.view), {"tran_id": f"BENCH-{i}", "val_id": f"VAL-{i}", "status": "VALID"}
+
+
+SCENARIOS = {
+    "catalog_list": CatalogList,
+    "catalog_list_cached": CatalogListCached,
+    "catalog_facets": CatalogFacets,
+    "catalog_search": CatalogSearch,
+    "catalog_autocomplete": CatalogAutocomplete,
+    "cart_add": CartAdd,
+    "checkout": Checkout,
+    "order_list": OrderList,
+    "payment": Payment,
+    "payment_ipn": PaymentIPN,
+}
+
+
+def scenario_fixtures(usernames):
+    """Service ids and each benchmark user's order ids, looked up once before the run."""
+    services = list(Service.objects.order_by("id").values_list("id", flat=True)[:500])
+    orders = {}
+    for username, order_id in Order.objects.filter(user__username__in=usernames).values_list(
+        "user__username", "id"
+    ).order_by("id"):
+        orders.setdefault(username, []).append(order_id)
+    return services, orders
+
+
+def warm_up(scenario, sessions):
+    """One untimed request per session, so one-off costs (imports, caches, creating the cart) aren't measured."""
+    for session in sessions:
+        scenario.prepare(session, session.username, 0)
+        session.call(*scenario.request(session.username, 0))
+
+
+def run_scenario(scenario, sessions, requests_per_session):
+    """
+    Drive ``scenario`` from one thread per session; return latency percentiles,
+    throughput and (when the transport can count them) queries per request.
+    """
+    timings, queries, errors = [], [], []
+    lock = threading.Lock()
+
+    def worker(session):
+        for i in range(requests_per_session):
+            scenario.prepare(session, session.username, i)
+            method, path, data = scenario.request(session.username, i)
+            started = time.perf_counter()
+            status, count = session.call(method, path, data)
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                timings.append(elapsed)
+                if count is not None:
+                    queries.append(count)
+                if status != scenario.expect:
+                    errors.append(f"{method} {path} -> {status}")
+
+    threads = [threading.Thread(target=worker, args=(s,)) for s in sessions]
+    started = time.perf_counter()
+    if len(threads) == 1:
+        worker(sessions[0])  # keep the test client on this thread's database connection
+    else:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - started
+
+    timings.sort()
+    return {
+        "requests": len(timings),
+        "errors": errors,
+        "throughput": len(timings) / elapsed,
+        "p50_ms": statistics.median(timings),
+        "p99_ms": timings[max(int(len(timings) * 0.99) - 1, 0)],
+        "queries": sum(queries) / len(queries) if queries else None,
+    }
+
+
+class TestClientSession:
+    """In-process transport: Django's test client with a JWT, counting queries per request."""
+
+    def __init__(self, username, token):
+        from django.test import Client
+
+        self.username = username
+        self.client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def call(self, method, path, data=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method.lower())(path, data, content_type="application/json")
+        return response.status_code, len(ctx.captured_queries)
+
+
+class HTTPSession:
+    """Over-the-wire transport for a running server; query counts come from its /api/metrics/."""
+
+    def __init__(self, base_url, username, token):
+        import requests
+
+        self.base_url = base_url
+        self.username = username
+        self.http = requests.Session()
+        self.http.headers["Authorization"] = f"Bearer {token}"
+
+    def call(self, method, path, data=None):
+        response = self.http.request(method, self.base_url + path, json=data, timeout=30)
+        return response.status_code, None
+
+
+def scrape_query_totals(session):
+    """{view: (sum of queries, requests)} from the server's request_db_queries histogram."""
+    text = session.http.get(session.base_url + reverse("metrics"), timeout=30).text
+    totals = {}
+    for line in text.splitlines():
+        match = re.match(r'household_request_db_queries_(sum|count)\{view="([^"]+)",method="[A-Z]+"\} ([\d.]+)', line)
+        if match:
+            kind, view, value = match.groups()
+            total, count = totals.get(view, (0.0, 0))
+            totals[view] = (total + float(value), count) if kind == "sum" else (total, count + int(value))
+    return totals
+
+
+def load_budgets(path=BUDGETS_PATH):
+    return json.loads(Path(path).read_text())
+
+
+def check_budgets(results, budgets, latency=True):
+    """List of human-readable budget violations (empty when everything is within budget)."""
+    failures = []
+    for name, result in results.items():
+        budget = budgets.get(name, {})
+        if result["errors"]:
+            failures.append(f"{name}: {len(result['errors'])} failed requests, e.g. {result['errors'][0]}")
+        if result["queries"] is not None and "queries" in budget and result["queries"] > budget["queries"]:
+            failures.append(f"{name}: {result['queries']:.1f} queries/request, budget {budget['queries']}")
+        if latency and "p99_ms" in budget and result["p99_ms"] > budget["p99_ms"]:
+            failures.append(f"{name}: p99 {result['p99_ms']:.1f} ms, budget {budget['p99_ms']} ms")
+    return failures
@@ -0,0 +1,118 @@
+# core/capacity.py
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+
+from .models import Order, OrderItem, ServiceSlot
+
+
+class CapacityError(Exception):
+    def __init__(self, day, service_ids):
+        super().__init__(f"Fully booked on {day}: service(s) {sorted(service_ids)}")
+        self.day = day
+        self.service_ids = service_ids
+
+
+def _per_slot(units):
+    return Case(*[When(pk=slot, then=Value(n)) for slot, n in units.items()], output_field=IntegerField())
+
+
+def _take(units, day):
+    """Add ``units`` ({slot id: units}) to the slots in one conditional UPDATE, all or nothing."""
+    per_slot = _per_slot(units)
+    try:
+        with transaction.atomic():
+            taken = ServiceSlot.objects.filter(pk__in=units, reserved__lte=F("capacity") - per_slot).update(
+                reserved=F("reserved") + per_slot
+            )
+            if taken != len(units):
+                raise CapacityError(day, ())  # undo the slots that did have room
+    except CapacityError:
+        full = ServiceSlot.objects.filter(pk__in=units, reserved__gt=F("capacity") - per_slot)
+        raise CapacityError(day, set(full.values_list("service_id", flat=True))) from None
+
+
+def _held_units(items):
+    return dict(items.filter(slot__isnull=False).order_by().values("slot").annotate(
+        units=Sum("quantity")
+    ).values_list("slot", "units"))
+
+
+def reserve(lines, day):
+    """
+    Reserve the ``quantity`` of each of ``lines`` (a CartItem queryset, one line
+    per service) on ``day``, all or nothing; returns {service_id: slot id} for
+    the services that have a capacity.
+
+    A single conditional UPDATE takes the units from every slot, and only from
+    slots with enough room left, so concurrent bookings can never overbook and
+    no row is read and written back. Services without a slot or a
+    ``daily_capacity`` are not limited. Raises CapacityError.
+    """
+    slot = ServiceSlot.objects.filter(service=OuterRef("service_id"), day=day).values("pk")[:1]
+    rows = lines.values_list("service_id", "quantity", "service__daily_capacity", Subquery(slot))
+    quantities, slots, missing = {}, {}, []
+    for service_id, quantity, daily_capacity, slot_id in rows:
+        quantities[service_id] = quantity
+        if slot_id is not None:
+            slots[service_id] = slot_id
+        elif daily_capacity is not None:
+            missing.append(ServiceSlot(service_id=service_id, day=day, capacity=daily_capacity))
+    if missing:
+        ServiceSlot.objects.bulk_create(missing, ignore_conflicts=True)  # a concurrent booking may create it first
+        slots.update(ServiceSlot.objects.filter(
+            service_id__in=[s.service_id for s in missing], day=day
+        ).values_list("service_id", "pk"))
+    if slots:
+        _take({slot: quantities[service] for service, slot in slots.items()}, day)
+    return slots
+
+
+@transaction.atomic
+def hold(order):
+    """
+    Book the order's lines again after its hold was released, for an order
+    being paid or completed after all; False if it already holds them or books
+    nothing limited. Raises CapacityError, changing nothing, if a day filled up.
+    """
+    units = _held_units(OrderItem.objects.filter(order=order))
+    if not units or not Order.objects.filter(pk=order.pk, capacity_held=False).update(capacity_held=True):
+        return False
+    _take(units, order.service_date)
+    order.capacity_held = True
+    return True
+
+
+@transaction.atomic
+def release_orders(orders):
+    """
+    Give back the units held by ``orders`` (a queryset) with one UPDATE per
+    table, whatever the number of orders; returns how many orders held some.
+    Orders already released are skipped, so releasing twice is harmless.
+    """
+    ids = list(orders.filter(capacity_held=True).select_for_update(of=("self",)).values_list("pk", flat=True))
+    if not ids:
+        return 0
+    held = _held_units(OrderItem.objects.filter(order__in=ids))
+    if held:
+        ServiceSlot.objects.filter(pk__in=held).update(reserved=F("reserved") - _per_slot(held))
+    Order.objects.filter(pk__in=ids).update(capacity_held=False)
+    return len(ids)
+
+
+def release(order):
+    """Give back the units ``order`` holds; False if it holds none (never held, or already released)."""
+    released = release_orders(Order.objects.filter(pk=order.pk))
+    order.capacity_held = False
+    return released == 1
+
+
+def order_changed(order):
+    """
+    Release the order's capacity once it is cancelled or its payment failed, and
+    book it again (or raise CapacityError) if such an order is revived.
+    """
+    if order.status == "cancelled" or order.payment_status == "failed":
+        if order.capacity_held:
+            release(order)
+    elif not order.capacity_held:
+        hold(order)
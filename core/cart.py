@@ -0,0 +1,59 @@
+# core/cart.py
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+
+from .models import Cart, CartItem, Service
+
+
+class UnknownServiceError(Exception):
+    def __init__(self, service_ids):
+        super().__init__(f"Unknown service(s): {sorted(service_ids)}")
+        self.service_ids = service_ids
+
+
+def _fold(operations):
+    """Collapse the batch to one (absolute quantity or None, delta) pair per service, in order."""
+    changes = {}
+    for op in operations:
+        base, delta = changes.get(op["service_id"], (None, 0))
+        if "quantity" in op:
+            base, delta = op["quantity"], 0
+        else:
+            delta += op["delta"]
+        changes[op["service_id"]] = (base, delta)
+    return changes
+
+
+@transaction.atomic
+def apply_cart_operations(user, operations):
+    """
+    Apply ``{"service_id", "delta"|"quantity"}`` operations to the user's cart.
+
+    Uses a fixed number of queries for any batch size: missing lines are
+    inserted with ON CONFLICT DO NOTHING and every quantity is then changed by
+    a single UPDATE evaluated in the database, so concurrent requests never
+    lose increments. Lines that reach zero are removed.
+    """
+    changes = _fold(operations)
+    missing = set(changes) - set(Service.objects.filter(pk__in=changes).values_list("pk", flat=True))
+    if missing:
+        raise UnknownServiceError(missing)
+
+    cart, _ = Cart.objects.get_or_create(user=user)
+    CartItem.objects.bulk_create(
+        [CartItem(cart=cart, service_id=service_id, quantity=0) for service_id in changes],
+        ignore_conflicts=True,
+    )
+    whens = []
+    for service_id, (base, delta) in changes.items():
+        if base is None:
+            value = Greatest(F("quantity") + delta, Value(0))
+        else:
+            value = Value(max(base + delta, 0))
+        whens.append(When(service_id=service_id, then=value))
+    cart.items.filter(service_id__in=changes).update(
+        quantity=Case(*whens, default=F("quantity"), output_field=IntegerField())
+    )
+    cart.items.filter(quantity=0).delete()
+    return cart
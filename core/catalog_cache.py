@@ -0,0 +1,114 @@
+# core/catalog_cache.py
+import hashlib
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .models import CatalogVersion
+
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+
+def _cache():
+    return caches[getattr(settings, "CATALOG_CACHE_ALIAS", "default")]
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def cache_stats():
+    """Hit/miss counters for this process."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def catalog_state():
+    """
+    ``(version, last modified)`` of the catalog. It is read from the database
+    rather than the cache, which may be per process (locmem), so no worker
+    keeps serving a version another worker has already bumped.
+    """
+    return CatalogVersion.objects.filter(pk=1).values_list("version", "modified").first() or (0, None)
+
+
+def bump_catalog_version():
+    now = timezone.now()
+    if not CatalogVersion.objects.filter(pk=1).update(version=F("version") + 1, modified=now):
+        # Seed from the clock so a recreated row never resurrects older cache entries.
+        CatalogVersion.objects.get_or_create(pk=1, defaults={"version": time.time_ns(), "modified": now})
+
+
+def invalidate_catalog_on_commit():
+    """Bump the version once the surrounding transaction commits, so readers never re-cache old rows."""
+    transaction.on_commit(bump_catalog_version)
+
+
+class CatalogCacheMixin:
+    """Read-through cache for the list/retrieve actions of the service catalog."""
+
+    def catalog_state(self):
+        """``catalog_state()``, read once per request for both the cache key and the ETag."""
+        if not hasattr(self, "_catalog_state"):
+            self._catalog_state = catalog_state()
+        return self._catalog_state
+
+    def _cache_key(self, request):
+        url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+        return f"catalog:{self.catalog_state()[0]}:{self.action}:{url}"
+
+    def _cached(self, request, render):
+        cache = _cache()
+        key = self._cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            _count("hits")
+            return Response(data, headers={"X-Cache": "HIT"})
+        _count("misses")
+        response = render()
+        if response.status_code == 200:
+            cache.set(key, response.data, getattr(settings, "CATALOG_CACHE_TIMEOUT", 300))
+        response["X-Cache"] = "MISS"
+        return response
+
+    async def _acached(self, request, render):
+        """``_cached`` for async views; ``render`` returns an awaitable."""
+        cache = _cache()
+        key = await sync_to_async(self._cache_key)(request)
+        data = await cache.aget(key)
+        if data is not None:
+            _count("hits")
+            return Response(data, headers={"X-Cache": "HIT"})
+        _count("misses")
+        response = await render()
+        if response.status_code == 200:
+            await cache.aset(key, response.data, getattr(settings, "CATALOG_CACHE_TIMEOUT", 300))
+        response["X-Cache"] = "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached(request, lambda: super(CatalogCacheMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached(request, lambda: super(CatalogCacheMixin, self).retrieve(request, *args, **kwargs))
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        invalidate_catalog_on_commit()
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        invalidate_catalog_on_commit()
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        invalidate_catalog_on_commit()
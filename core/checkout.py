@@ -0,0 +1,67 @@
+# core/checkout.py
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .analytics import order_placed
+from .capacity import reserve
+from .models import Cart, CartItem, Order, OrderItem, Service
+from .tasks import send_order_confirmation
+from .totals import order_totals
+
+
+class EmptyCartError(Exception):
+    pass
+
+
+def _copy_cart_items(cart, order, slots):
+    """
+    INSERT ... SELECT the cart lines into the order, priced from the current
+    catalog and linked to ``slots``; returns the number of lines. Zero-quantity
+    lines are left behind.
+    """
+    qn = connection.ops.quote_name
+    col = lambda model, name: qn(model._meta.get_field(name).column)
+    slot_sql, slot_params = "NULL", []
+    if slots:
+        slot_sql = f"CASE ci.{col(CartItem, 'service')} {' '.join(['WHEN %s THEN %s'] * len(slots))} END"
+        slot_params = [value for pair in slots.items() for value in pair]
+    sql = (
+        f"INSERT INTO {qn(OrderItem._meta.db_table)} "
+        f"({col(OrderItem, 'order')}, {col(OrderItem, 'service')}, {col(OrderItem, 'quantity')}, "
+        f"{col(OrderItem, 'price_at_purchase')}, {col(OrderItem, 'slot')}) "
+        f"SELECT %s, ci.{col(CartItem, 'service')}, ci.{col(CartItem, 'quantity')}, s.{col(Service, 'price')}, "
+        f"{slot_sql} "
+        f"FROM {qn(CartItem._meta.db_table)} ci "
+        f"INNER JOIN {qn(Service._meta.db_table)} s ON s.{col(Service, 'id')} = ci.{col(CartItem, 'service')} "
+        f"WHERE ci.{col(CartItem, 'cart')} = %s AND ci.{col(CartItem, 'quantity')} > 0"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [order.pk, *slot_params, cart.pk])
+        return cursor.rowcount
+
+
+@transaction.atomic
+def place_order(user, day=None):
+    """
+    Turn the user's cart into an order booked for ``day`` (default: today) in one
+    transaction with a fixed number of queries. Raises CapacityError, leaving the
+    cart as it was, when a service is fully booked that day.
+    """
+    day = day or timezone.localdate()
+    cart = Cart.objects.select_for_update().filter(user=user).first()
+    if cart is None:
+        raise EmptyCartError
+    slots = reserve(cart.items.filter(quantity__gt=0), day)
+
+    order = Order.objects.create(user=user, status="pending", service_date=day, capacity_held=bool(slots))
+    if not _copy_cart_items(cart, order, slots):
+        raise EmptyCartError  # rolls back the order
+    # The total comes from the lines just copied, not from a second read of the
+    # catalog, so a concurrent price change cannot make the two disagree.
+    summary = order_totals(order.items.all())
+    order.total_amount, order.item_count = summary["total"], summary["item_count"]
+    Order.objects.filter(pk=order.pk).update(total_amount=order.total_amount, updated_at=order.updated_at)
+    cart.items.all().delete()
+    order_placed(order)
+    send_order_confirmation.enqueue_on_commit(order_id=order.pk)
+    return order
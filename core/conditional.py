@@ -0,0 +1,55 @@
+# core/conditional.py
+from asgiref.sync import sync_to_async
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified handling for list and retrieve.
+
+    Views supply the validators from cheap metadata via ``get_validators``;
+    when the client's copy is current a 304 is returned before anything is
+    serialized.
+    """
+
+    def get_validators(self, request, *args, **kwargs):
+        """Return ``(etag, last_modified)`` for the current list/retrieve request; either may be None."""
+        raise NotImplementedError
+
+    async def aget_validators(self, request, *args, **kwargs):
+        """``get_validators`` for async views; override it to use the async ORM."""
+        return await sync_to_async(self.get_validators)(request, *args, **kwargs)
+
+    def _conditional(self, request, render, *args, **kwargs):
+        etag, last_modified = self.get_validators(request, *args, **kwargs)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = render()
+        return self._add_validators(response, etag, timestamp)
+
+    async def _aconditional(self, request, render, *args, **kwargs):
+        """``_conditional`` for async views; ``render`` returns an awaitable."""
+        etag, last_modified = await self.aget_validators(request, *args, **kwargs)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = await render()
+        return self._add_validators(response, etag, timestamp)
+
+    def _add_validators(self, response, etag, timestamp):
+        if response.status_code in (200, 304):
+            if etag:
+                response.headers.setdefault("ETag", etag)
+            if timestamp is not None:
+                response.headers.setdefault("Last-Modified", http_date(timestamp))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        render = lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        return self._conditional(request, render, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        render = lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+        return self._conditional(request, render, *args, **kwargs)
@@ -0,0 +1,178 @@
+# core/dataio.py
+import csv
+import json
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import (
+    CharField, DateTimeField, Exists, F, OuterRef, Subquery, Sum, TextField,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .analytics import rebuild_orders
+from .catalog_cache import invalidate_catalog_on_commit
+from .models import Order, OrderItem, Review, Service
+from .ratings import rebuild_ratings
+from .totals import order_line_total
+
+# Columns per dataset. "user" is exported as the username so files can move between databases;
+# the stored rating aggregates are not exported, they are rebuilt from the reviews on import.
+DATASETS = {
+    "services": (Service, ["id", "name", "description", "category", "price", "daily_capacity", "created_at"]),
+    "reviews": (Review, ["id", "user", "service_id", "rating", "comment", "created_at"]),
+    "orders": (Order, [
+        "id", "user", "name", "email", "phone", "address", "status", "payment_status",
+        "total_amount", "tran_id", "service_date", "created_at", "updated_at",
+    ]),
+    "orderitems": (OrderItem, ["id", "order_id", "service_id", "quantity", "price_at_purchase"]),
+}
+
+
+class DataImportError(ValueError):
+    pass
+
+
+# ---------------- Export ----------------
+def export_rows(dataset, chunk_size=2000):
+    """Stream the rows of ``dataset`` as dicts, ``chunk_size`` rows per database round trip."""
+    model, columns = DATASETS[dataset]
+    lookups = ["user__username" if c == "user" else c for c in columns]
+    rows = model.objects.order_by("id").values_list(*lookups).iterator(chunk_size=chunk_size)
+    for row in rows:
+        yield dict(zip(columns, row))
+
+
+def write_jsonl(rows, stream):
+    count = 0
+    for row in rows:
+        stream.write(json.dumps(row, default=_text) + "\n")
+        count += 1
+    return count
+
+
+def write_csv(rows, stream, columns):
+    writer = csv.DictWriter(stream, fieldnames=columns, lineterminator="\n")
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        writer.writerow({k: "" if v is None else _text(v) for k, v in row.items()})
+        count += 1
+    return count
+
+
+def _text(value):
+    """Full-precision text for datetimes and decimals (DjangoJSONEncoder would cut microseconds)."""
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+# ---------------- Import ----------------
+def read_jsonl(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv(stream):
+    yield from csv.DictReader(stream)
+
+
+def _timestamp_fields(model):
+    return [f for f in model._meta.concrete_fields if isinstance(f, DateTimeField) and (f.auto_now or f.auto_now_add)]
+
+
+@contextmanager
+def _explicit_timestamps(model):
+    """Let bulk_create keep the created_at/updated_at values from the file instead of stamping now()."""
+    saved = [(f, f.auto_now, f.auto_now_add) for f in _timestamp_fields(model)]
+    for f, _, _ in saved:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield [f for f, _, _ in saved]
+    finally:
+        for f, auto_now, auto_now_add in saved:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+def _build(model, columns, rows, usernames, timestamps):
+    fields = {c: model._meta.get_field(c) for c in columns}  # get_field also resolves "service_id" style attnames
+    objs = []
+    for row in rows:
+        values = {}
+        for column, field in fields.items():
+            value = row.get(column)
+            if value is None or value == "":  # CSV can't tell the two apart
+                if column == "id" or field.null:
+                    values[column] = None
+                elif isinstance(field, (CharField, TextField)) and (value == "" or field.blank):
+                    values[column] = ""
+                elif not (field.has_default() or field in timestamps):
+                    raise DataImportError(f"{model.__name__}: missing {column!r} in {row}")
+                continue
+            if column == "user":
+                if value not in usernames:
+                    raise DataImportError(f"{model.__name__}: unknown user {value!r}")
+                values["user_id"] = usernames[value]
+            elif field.is_relation:
+                values[column] = int(value)
+            else:
+                values[column] = field.to_python(value)
+        for field in timestamps:
+            values.setdefault(field.attname, values.get("created_at") or timezone.now())
+        objs.append(model(**values))
+    return objs
+
+
+def import_rows(dataset, rows, batch_size=1000):
+    """
+    Insert ``rows`` (an iterable of dicts) into ``dataset`` in one transaction,
+    ``batch_size`` at a time with bulk_create, then rebuild the aggregates that
+    depend on them. Returns the number of rows inserted.
+    """
+    model, columns = DATASETS[dataset]
+    rows = iter(rows)
+    count = 0
+    id_range = [None, None]  # ids of the parents whose aggregates need a rebuild
+    parent = {"reviews": "service_id", "orders": "id", "orderitems": "order_id"}.get(dataset)
+
+    with transaction.atomic(), _explicit_timestamps(model) as timestamps:
+        while chunk := list(islice(rows, batch_size)):
+            usernames = {}
+            if "user" in columns:
+                wanted = {row.get("user") for row in chunk}
+                usernames = dict(get_user_model().objects.filter(username__in=wanted).values_list("username", "id"))
+            objs = model.objects.bulk_create(_build(model, columns, chunk, usernames, timestamps), batch_size=batch_size)
+            count += len(objs)
+            ids = [getattr(obj, parent) for obj in objs] if parent else []
+            if ids and None not in ids:
+                low, high = min(ids), max(ids)
+                id_range = [low, high] if id_range[0] is None else [min(id_range[0], low), max(id_range[1], high)]
+
+        # explicit ids leave PostgreSQL sequences behind the table
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [model]):
+                cursor.execute(sql)
+
+        if dataset == "services":
+            invalidate_catalog_on_commit()
+        elif dataset == "reviews" and id_range[0] is not None:
+            rebuild_ratings(Service.objects.filter(id__range=id_range))
+            invalidate_catalog_on_commit()
+        elif dataset in ("orders", "orderitems") and id_range[0] is not None:
+            recompute_order_totals(Order.objects.filter(id__range=id_range))
+            rebuild_orders(Order.objects.filter(id__range=id_range))
+    return count
+
+
+def recompute_order_totals(orders):
+    """Set ``total_amount`` to the sum of each order's lines in one UPDATE (orders without lines are left alone)."""
+    totals = OrderItem.objects.filter(order=OuterRef("pk")).order_by().values("order").annotate(
+        total=Sum(order_line_total())
+    ).values("total")
+    return orders.filter(Exists(OrderItem.objects.filter(order=OuterRef("pk")))).update(
+        total_amount=Coalesce(Subquery(totals), F("total_amount")),
+        updated_at=timezone.now(),
+    )
@@ -0,0 +1,90 @@
+# core/facets.py
+from django.conf import settings
+from django.db.models import Count, Q
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Service
+from .serializers import CatalogFilterSerializer
+
+RATING_FLOORS = (1, 2, 3, 4)
+
+
+def price_buckets():
+    """``[(low, high), ...]`` from CATALOG_PRICE_BUCKETS; the last bucket is open-ended."""
+    edges = [0, *getattr(settings, "CATALOG_PRICE_BUCKETS", (25, 50, 100, 200, 500))]
+    return list(zip(edges, [*edges[1:], None]))
+
+
+def facet_conditions(filters):
+    """One Q per facet dimension for the validated filter params; empty dimensions are left out."""
+    conditions = {}
+    price = Q()
+    if filters.get("min_price") is not None:
+        price &= Q(price__gte=filters["min_price"])
+    if filters.get("max_price") is not None:
+        price &= Q(price__lte=filters["max_price"])
+    if price:
+        conditions["price"] = price
+    if filters.get("min_rating") is not None:
+        conditions["rating"] = Q(rating__gte=filters["min_rating"])
+    if filters.get("category"):
+        conditions["category"] = Q(category__in=filters["category"])
+    return conditions
+
+
+def facet_counts(queryset, filters):
+    """
+    Sidebar counts for price buckets, rating floors and categories in one
+    aggregate query. Each facet applies every filter except its own, so the
+    client can see what widening that facet would return.
+    """
+    return _shape(queryset.order_by().aggregate(**_aggregates(filters)))
+
+
+async def afacet_counts(queryset, filters):
+    return _shape(await queryset.order_by().aaggregate(**_aggregates(filters)))
+
+
+def _aggregates(filters):
+    conditions = facet_conditions(filters)
+
+    def others(dimension):
+        return Q(*(q for name, q in conditions.items() if name != dimension))
+
+    aggregates = {}
+    for i, (low, high) in enumerate(price_buckets()):
+        bucket = Q(price__gte=low) & (Q(price__lt=high) if high is not None else Q())
+        aggregates[f"price_{i}"] = Count("id", filter=bucket & others("price"))
+    for stars in RATING_FLOORS:
+        aggregates[f"rating_{stars}"] = Count("id", filter=Q(rating__gte=stars) & others("rating"))
+    for value, _ in Service.CATEGORY_CHOICES:
+        aggregates[f"category_{value}"] = Count("id", filter=Q(category=value) & others("category"))
+    return aggregates
+
+
+def _shape(counts):
+    return {
+        "price": [
+            {"min": low, "max": high, "count": counts[f"price_{i}"]} for i, (low, high) in enumerate(price_buckets())
+        ],
+        "rating": [{"min": stars, "count": counts[f"rating_{stars}"]} for stars in RATING_FLOORS],
+        "category": [
+            {"value": value, "label": label, "count": counts[f"category_{value}"]}
+            for value, label in Service.CATEGORY_CHOICES
+        ],
+    }
+
+
+class CatalogFacetFilter(BaseFilterBackend):
+    """
+    ``?category=a,b&min_price=&max_price=&min_rating=`` filtering. The
+    unfiltered queryset and the parsed params are kept on the view for
+    ``facet_counts``.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = CatalogFilterSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        view.facet_queryset, view.facet_filters = queryset, params.validated_data
+        conditions = facet_conditions(params.validated_data)
+        return queryset.filter(*conditions.values()) if conditions else queryset
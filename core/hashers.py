@@ -0,0 +1,14 @@
+# core/hashers.py
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2id with the OWASP minimum parameters (19 MiB, t=2, p=1) by default,
+    roughly 10x cheaper to verify than Django's PBKDF2 default. Stored hashes
+    with other parameters are rewritten on the next successful login.
+    """
+    time_cost = getattr(settings, "ARGON2_TIME_COST", 2)
+    memory_cost = getattr(settings, "ARGON2_MEMORY_COST", 19456)  # KiB
+    parallelism = getattr(settings, "ARGON2_PARALLELISM", 1)
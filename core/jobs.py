@@ -0,0 +1,153 @@
+# core/jobs.py
+import functools
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThan
+from django.utils import timezone
+
+from .models import Job, JobQueue
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+class Task:
+    """A function that can be queued as a Job. Calling it still runs it inline."""
+
+    def __init__(self, fn, queue, max_attempts):
+        functools.update_wrapper(self, fn)
+        self.fn = fn
+        self.name = f"{fn.__module__}.{fn.__qualname__}"
+        self.queue = queue
+        self.max_attempts = max_attempts
+
+    def __call__(self, **kwargs):
+        return self.fn(**kwargs)
+
+    def enqueue(self, delay=0, **kwargs):
+        """Queue a run with JSON-serializable ``kwargs``, ``delay`` seconds from now."""
+        return Job.objects.create(
+            task=self.name, queue=self.queue, payload=kwargs,
+            max_attempts=self.max_attempts or settings.JOB_MAX_ATTEMPTS,
+            run_at=timezone.now() + timedelta(seconds=delay),
+        )
+
+    def enqueue_on_commit(self, **kwargs):
+        """Queue the job once the surrounding transaction commits, so it never sees rolled back rows."""
+        transaction.on_commit(lambda: self.enqueue(**kwargs))
+
+
+def task(queue="default", max_attempts=None):
+    """Register the decorated function as a task on ``queue``."""
+    def register(fn):
+        t = Task(fn, queue, max_attempts)
+        TASKS[t.name] = t
+        return t
+    return register
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def queue_limit(queue):
+    """Most jobs of ``queue`` allowed to run at once, across all workers."""
+    limits = getattr(settings, "JOB_QUEUES", {})
+    return limits.get(queue, limits.get("default", 1))
+
+
+# ---------------- Worker ----------------
+@transaction.atomic
+def _claim(job, worker):
+    """
+    Move a due job to ``running``; False if another worker got it first or its queue is full.
+
+    The queue's row is locked first: without it, concurrent claims on databases
+    that do not serialize writers (PostgreSQL under READ COMMITTED) could each
+    count the same running jobs and together run more than the limit.
+    """
+    JobQueue.objects.select_for_update().get_or_create(name=job.queue)
+    running = Job.objects.filter(queue=OuterRef("queue"), status="running").order_by().values("queue").annotate(
+        n=Count("id")
+    ).values("n")
+    return Job.objects.filter(
+        GreaterThan(Value(queue_limit(job.queue)), Coalesce(Subquery(running), 0)),
+        pk=job.pk, status="queued", run_at__lte=timezone.now(),
+    ).update(status="running", attempts=F("attempts") + 1, locked_by=worker, locked_at=timezone.now()) == 1
+
+
+def _finish(job, status, error=""):
+    Job.objects.filter(pk=job.pk).update(status=status, last_error=error, finished_at=timezone.now())
+    return status
+
+
+def run(job):
+    """Run one claimed job; returns ``done``, ``retry`` or ``dead``."""
+    try:
+        task = TASKS.get(job.task)
+        if task is None:
+            raise LookupError(f"unknown task {job.task!r}")
+        with transaction.atomic():  # a failed attempt leaves no partial writes behind
+            task.fn(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            logger.error("Job %s (%s) failed %s times, giving up:\n%s", job.pk, job.task, job.attempts, error)
+            return _finish(job, "dead", error)
+        delay = settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+        logger.warning("Job %s (%s) failed, retrying in %ss:\n%s", job.pk, job.task, delay, error)
+        Job.objects.filter(pk=job.pk).update(
+            status="queued", last_error=error, run_at=timezone.now() + timedelta(seconds=delay),
+            locked_by="", locked_at=None,
+        )
+        return "retry"
+    return _finish(job, "done")
+
+
+def requeue_stale():
+    """Queue again the jobs whose worker died mid-run (running longer than ``JOB_TIMEOUT``)."""
+    now = timezone.now()
+    stale = Job.objects.filter(status="running", locked_at__lt=now - timedelta(seconds=settings.JOB_TIMEOUT))
+    dead = stale.filter(attempts__gte=F("max_attempts")).update(
+        status="dead", last_error="worker timed out", finished_at=now
+    )
+    return dead + stale.update(status="queued", locked_by="", locked_at=None)
+
+
+def requeue_dead(jobs=None):
+    """Give dead jobs a fresh set of attempts."""
+    jobs = Job.objects.all() if jobs is None else jobs
+    return jobs.filter(status="dead").update(
+        status="queued", attempts=0, run_at=timezone.now(), locked_by="", locked_at=None, finished_at=None
+    )
+
+
+def work(queues=None, limit=100, worker=None):
+    """Run up to ``limit`` due jobs, oldest first; returns {outcome: count}."""
+    worker = worker or worker_id()
+    requeue_stale()
+    due = Job.objects.filter(status="queued", run_at__lte=timezone.now())
+    if queues:
+        due = due.filter(queue__in=queues)
+    counts = {}
+    for job in due.order_by("run_at", "id")[:limit]:
+        if not _claim(job, worker):
+            continue
+        job.attempts += 1
+        outcome = run(job)
+        counts[outcome] = counts.get(outcome, 0) + 1
+    return counts
+
+
+def purge_finished(days):
+    """Delete jobs that finished successfully more than ``days`` days ago."""
+    return Job.objects.filter(status="done", finished_at__lt=timezone.now() - timedelta(days=days)).delete()[0]
@@ -0,0 +1,169 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.benchmarks import (
+    BUDGETS_PATH, SCALES, SCENARIOS, HTTPSession, TestClientSession, check_budgets, isolated_database,
+    load_budgets, run_scenario, scenario_fixtures, scrape_query_totals, seed, warm_up,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic dataset and benchmark the main API routes (catalog, cart, checkout, orders, "
+        "payment) through the test client, a local gunicorn (WSGI) server or a local uvicorn (ASGI, "
+        "async views) server. Fails when a scenario exceeds its query or latency budget in "
+        "core/benchmark_budgets.json."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=SCALES, default="small")
+        for name in ("users", "services", "reviews", "orders"):
+            parser.add_argument(f"--{name}", type=int, help=f"Override the number of {name} for --scale")
+        parser.add_argument("--transport", choices=["client", "gunicorn", "uvicorn"], default="client")
+        parser.add_argument("--requests", type=int, default=50, help="Requests per scenario and client thread")
+        parser.add_argument("--concurrency", type=int, default=4, help="Client threads (servers only)")
+        parser.add_argument("--workers", type=int, default=1,
+                            help="Server workers; query counts are only reported for a single worker")
+        parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="Run only these scenarios")
+        parser.add_argument("--budgets", default=str(BUDGETS_PATH))
+        parser.add_argument("--no-latency-budget", action="store_true", help="Only enforce query budgets")
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+        parser.add_argument("--seed-only", action="store_true", help="Seed the configured database (internal)")
+
+    def handle(self, *args, **options):
+        sizes = {name: options[name] or size for name, size in SCALES[options["scale"]].items()}
+        names = options["scenario"] or list(SCENARIOS)
+
+        if options["seed_only"]:
+            self.stdout.write(json.dumps(self.seed(sizes, options["concurrency"])))
+            return
+        if options["transport"] != "client":
+            results = self.run_server(sizes, names, options)
+        else:
+            with isolated_database():
+                fixtures = self.seed(sizes, 1)
+                sessions = [TestClientSession(username, token) for username, token in fixtures["tokens"].items()]
+                results = {}
+                for name in names:
+                    scenario = SCENARIOS[name](fixtures["services"], fixtures["orders"])
+                    warm_up(scenario, sessions)
+                    results[name] = run_scenario(scenario, sessions, options["requests"])
+
+        self.report(results, options)
+        budgets = load_budgets(options["budgets"])[options["transport"]]
+        failures = check_budgets(results, budgets, latency=not options["no_latency_budget"])
+        if failures:
+            raise CommandError("Benchmark budgets exceeded:\n  " + "\n  ".join(failures))
+
+    def seed(self, sizes, sessions):
+        """Seed the current database; returns JWTs for the client users plus the scenario fixtures."""
+        call_command("migrate", verbosity=0)
+        users = seed(**sizes)[:sessions]
+        tokens = {user.username: str(RefreshToken.for_user(user).access_token) for user in users}
+        services, orders = scenario_fixtures(list(tokens))
+        ops = get_user_model().objects.create_user(username="bench-metrics", password="x", role="admin")
+        return {
+            "tokens": tokens, "services": services, "orders": orders,
+            "metrics_token": str(RefreshToken.for_user(ops).access_token),
+        }
+
+    def server_command(self, transport, port, options):
+        if transport == "uvicorn":
+            # one event loop per worker; sync_to_async work runs on each request's own thread
+            return [sys.executable, "-m", "uvicorn", "household.asgi:application", "--host", "127.0.0.1",
+                    "--port", str(port), "--workers", str(options["workers"]), "--log-level", "warning"]
+        return [sys.executable, "-m", "gunicorn", "household.wsgi:application", "--bind", f"127.0.0.1:{port}",
+                "--workers", str(options["workers"]), "--threads", str(options["concurrency"]),
+                "--log-level", "warning"]
+
+    def run_server(self, sizes, names, options):
+        transport = options["transport"]
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {
+                **os.environ, "SQLITE_PATH": str(Path(tmp) / "bench.sqlite3"), "DATABASE_URL": "",
+                "METRICS_ENABLED": "True", "DEBUG": "False", "ASYNC_API": str(transport == "uvicorn"),
+            }
+            manage = str(Path(settings.BASE_DIR) / "manage.py")
+            command = [sys.executable, manage, "bench_api", "--seed-only", "--concurrency", str(options["concurrency"])]
+            command += [arg for name, size in sizes.items() for arg in (f"--{name}", str(size))]
+            output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+            fixtures = json.loads(output.strip().splitlines()[-1])
+
+            with socket.socket() as sock:
+                sock.bind(("127.0.0.1", 0))
+                port = sock.getsockname()[1]
+            server = subprocess.Popen(self.server_command(transport, port, options), cwd=settings.BASE_DIR, env=env)
+            base_url = f"http://127.0.0.1:{port}"
+            try:
+                self.wait_for(base_url, server, transport)
+                sessions = [HTTPSession(base_url, username, token) for username, token in fixtures["tokens"].items()]
+                metrics = HTTPSession(base_url, "bench-metrics", fixtures["metrics_token"])
+                results = {}
+                for name in names:
+                    scenario = SCENARIOS[name](fixtures["services"], fixtures["orders"])
+                    warm_up(scenario, sessions)
+                    before = scrape_query_totals(metrics)
+                    results[name] = run_scenario(scenario, sessions, options["requests"])
+                    after = scrape_query_totals(metrics)
+                    if options["workers"] == 1:
+                        total, count = after.get(scenario.view, (0, 0))
+                        total_before, count_before = before.get(scenario.view, (0, 0))
+                        if count > count_before:
+                            results[name]["queries"] = (total - total_before) / (count - count_before)
+                    results[name]["rss_mb"] = self.rss_mb(server.pid)
+                return results
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+    def wait_for(self, base_url, server, transport, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"{transport} exited during startup")
+            try:
+                requests.get(base_url + "/", timeout=1)
+                return
+            except requests.ConnectionError:
+                time.sleep(0.2)
+        raise CommandError(f"{transport} did not start within {timeout}s")
+
+    def rss_mb(self, pid):
+        """Resident memory of the server process and its workers, from /proc (None elsewhere)."""
+        total, pending = 0, [pid]
+        try:
+            while pending:
+                pid = pending.pop()
+                total += int(Path(f"/proc/{pid}/statm").read_text().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+                pending += [int(child) for child in Path(f"/proc/{pid}/task/{pid}/children").read_text().split()]
+        except (OSError, ValueError):
+            return None
+        return round(total / 2**20, 1)
+
+    def report(self, results, options):
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(
+            f"{'scenario':<20} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'queries':>8} {'errors':>7} {'rss MB':>7}"
+        )
+        for name, result in results.items():
+            queries = "-" if result["queries"] is None else f"{result['queries']:.1f}"
+            rss = "-" if result.get("rss_mb") is None else f"{result['rss_mb']:.1f}"
+            self.stdout.write(
+                f"{name:<20} {result['throughput']:>8.1f} {result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+                f"{queries:>8} {len(result['errors']):>7} {rss:>7}"
+            )
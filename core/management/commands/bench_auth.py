@@ -0,0 +1,39 @@
+from base64 import b64encode
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.benchmarks import isolated_database, measure
+
+
+class Command(BaseCommand):
+    help = "Compare per-request authentication cost of Basic, session and JWT auth on an authenticated endpoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            user = get_user_model().objects.create_user(username="bench", password="bench-password-123")
+            url = reverse("orders-list")
+            basic = b64encode(b"bench:bench-password-123").decode()
+            bearer = str(RefreshToken.for_user(user).access_token)
+            session = Client()
+            session.force_login(user)
+            client = Client()
+
+            cases = {
+                "basic": lambda: client.get(url, HTTP_AUTHORIZATION=f"Basic {basic}"),
+                "session": lambda: session.get(url),
+                "jwt": lambda: client.get(url, HTTP_AUTHORIZATION=f"Bearer {bearer}"),
+            }
+            self.stdout.write(f"{'auth':<8} {'p50 ms':>8} {'p99 ms':>8} {'queries':>8}")
+            for name, call in cases.items():
+                assert call().status_code == 200, name
+                result = measure(call, options["requests"])
+                self.stdout.write(
+                    f"{name:<8} {result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['queries']:>8.1f}"
+                )
@@ -0,0 +1,55 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core.benchmarks import isolated_database, measure, seed
+from core.models import Order, Review, Service
+from core.serializers import OrderSerializer, ReviewSerializer, ServiceSerializer
+from core.sparse import plain_sources
+from core.totals import with_order_totals
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF's ListSerializer with the FastListSerializer path (model instances, values() rows and "
+        "a ?fields= subset) on large service, review and order lists. Timings include fetching the rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        with isolated_database():
+            call_command("migrate", verbosity=0)
+            seed(users=10, services=rows, reviews=rows, orders=rows)
+            sparse = {"request": Request(APIRequestFactory().get("/", {"fields": "id,name,price"}))}
+            values = list(plain_sources(ServiceSerializer()).values())
+            orders = with_order_totals(Order.objects).prefetch_related(OrderSerializer.items_prefetch())
+
+            cases = {
+                "services drf": lambda: _drf(ServiceSerializer, Service.objects.all()),
+                "services fast": lambda: ServiceSerializer(list(Service.objects.all()), many=True).data,
+                "services values": lambda: ServiceSerializer(list(Service.objects.values(*values)), many=True).data,
+                "services fields": lambda: ServiceSerializer(
+                    list(Service.objects.values("id", "name", "price")), many=True, context=sparse
+                ).data,
+                "reviews drf": lambda: _drf(ReviewSerializer, Review.objects.all()),
+                "reviews fast": lambda: ReviewSerializer(list(Review.objects.all()), many=True).data,
+                "orders drf": lambda: _drf(OrderSerializer, orders.all()),
+                "orders fast": lambda: OrderSerializer(list(orders.all()), many=True).data,
+            }
+            self.stdout.write(f"{'case':<18} {'p50 ms':>8} {'p99 ms':>8} {'queries':>8}")
+            for name, call in cases.items():
+                result = measure(call, options["repeat"])
+                self.stdout.write(
+                    f"{name:<18} {result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f} {result['queries']:>8.1f}"
+                )
+
+
+def _drf(serializer_class, queryset):
+    """The stock ListSerializer, as ``serializer_class(many=True)`` rendered before FastListSerializer."""
+    return serializers.ListSerializer(list(queryset), child=serializer_class()).data
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from core.dataio import DATASETS, export_rows, write_csv, write_jsonl
+
+
+class Command(BaseCommand):
+    help = "Stream services, reviews, orders or order items to JSONL or CSV without loading them into memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=DATASETS)
+        parser.add_argument("output", nargs="?", default="-", help="File to write, or - for stdout")
+        parser.add_argument("--format", choices=["jsonl", "csv"], help="Defaults to the output file extension")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options["output"]
+        fmt = options["format"] or ("csv" if path.endswith(".csv") else "jsonl")
+        rows = export_rows(options["dataset"], options["chunk_size"])
+        stream = self.stdout if path == "-" else open(path, "w", newline="", encoding="utf-8")
+        try:
+            if fmt == "csv":
+                count = write_csv(rows, stream, DATASETS[options["dataset"]][1])
+            else:
+                count = write_jsonl(rows, stream)
+        finally:
+            if path != "-":
+                stream.close()
+        self.stderr.write(f"Exported {count} {options['dataset']}")
@@ -0,0 +1,37 @@
+import sys
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from core.dataio import DATASETS, DataImportError, import_rows, read_csv, read_jsonl
+
+
+class Command(BaseCommand):
+    help = (
+        "Load services, reviews, orders or order items from JSONL or CSV with chunked bulk_create, "
+        "then rebuild service ratings / order totals in set-based SQL. All or nothing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=DATASETS)
+        parser.add_argument("input", help="File to read, or - for stdin")
+        parser.add_argument("--format", choices=["jsonl", "csv"], help="Defaults to the input file extension")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options["input"]
+        fmt = options["format"] or ("csv" if path.endswith(".csv") else "jsonl")
+        stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+        started = time.perf_counter()
+        try:
+            rows = read_csv(stream) if fmt == "csv" else read_jsonl(stream)
+            count = import_rows(options["dataset"], rows, options["batch_size"])
+        except (DataImportError, IntegrityError, ValidationError, ValueError) as exc:
+            raise CommandError(f"Import failed, nothing was written: {exc}")
+        finally:
+            if path != "-":
+                stream.close()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"Imported {count} {options['dataset']} in {elapsed:.1f}s ({count / max(elapsed, 1e-9):.0f} rows/s)")
@@ -0,0 +1,107 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+
+from core.cart import apply_cart_operations
+from core.checkout import place_order
+from core.models import Service
+
+MODES = {
+    # the settings before DB tuning: rollback journal, deferred transactions, 5s busy timeout
+    "legacy": {"SQLITE_TUNING": "False", "DB_CONN_MAX_AGE": "0"},
+    "tuned": {"SQLITE_TUNING": "True"},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrent checkout load test against a throwaway SQLite file, comparing the "
+        "legacy connection settings with the tuned ones (WAL, IMMEDIATE transactions, busy timeout)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--checkouts", type=int, default=25, help="Checkouts per thread")
+        parser.add_argument("--items", type=int, default=3, help="Cart lines per checkout")
+        parser.add_argument("--mode", choices=MODES, help="Run a single mode in this process (internal)")
+
+    def handle(self, *args, **options):
+        if options["mode"]:
+            self.stdout.write(json.dumps(self.run(options)))
+            return
+
+        self.stdout.write(f"{'mode':<8} {'checkouts/s':>12} {'ok':>6} {'errors':>7} {'p50 ms':>8} {'p99 ms':>8}")
+        for mode, env in MODES.items():
+            with tempfile.TemporaryDirectory() as tmp:
+                result = self.spawn(mode, env, Path(tmp) / "loadtest.sqlite3", options)
+            self.stdout.write(
+                f"{mode:<8} {result['throughput']:>12.1f} {result['ok']:>6} {result['errors']:>7} "
+                f"{result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f}"
+            )
+
+    def spawn(self, mode, env, path, options):
+        command = [
+            sys.executable, str(Path(settings.BASE_DIR) / "manage.py"), "loadtest_checkout", "--mode", mode,
+            "--threads", str(options["threads"]), "--checkouts", str(options["checkouts"]),
+            "--items", str(options["items"]),
+        ]
+        env = {**os.environ, **env, "SQLITE_PATH": str(path), "DATABASE_URL": ""}
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+    def run(self, options):
+        call_command("migrate", verbosity=0)
+        User = get_user_model()
+        services = Service.objects.bulk_create(
+            Service(name=f"Load {i}", description="", price=Decimal("10.00") + i) for i in range(options["items"])
+        )
+        users = [User.objects.create(username=f"load{i}") for i in range(options["threads"])]
+        operations = [{"service_id": s.id, "delta": 1} for s in services]
+
+        latencies, errors, lock = [], [0], threading.Lock()
+
+        def worker(user):
+            try:
+                for _ in range(options["checkouts"]):
+                    started = time.perf_counter()
+                    try:
+                        apply_cart_operations(user, operations)
+                        place_order(user)
+                    except OperationalError:
+                        with lock:
+                            errors[0] += 1
+                        continue
+                    with lock:
+                        latencies.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(user,)) for user in users]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            "ok": len(latencies),
+            "errors": errors[0],
+            "throughput": len(latencies) / elapsed,
+            "p50_ms": statistics.median(latencies) * 1000 if latencies else 0,
+            "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0,
+        }
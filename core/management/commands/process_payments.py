@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.payments.settlement import process_pending
+
+
+class Command(BaseCommand):
+    help = "Validate stored payment callbacks against the gateway and settle their orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Process what is queued and exit")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds to sleep when the queue is empty")
+        parser.add_argument("--limit", type=int, default=100, help="Notifications per batch")
+
+    def handle(self, *args, **options):
+        while True:
+            counts = process_pending(limit=options["limit"])
+            if counts:
+                summary = ", ".join(f"{status}={n}" for status, n in sorted(counts.items()))
+                self.stdout.write(f"Processed notifications: {summary}")
+            if options["once"]:
+                return
+            if not counts:
+                time.sleep(options["interval"])
@@ -0,0 +1,17 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from core.analytics import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily sales rollups behind the analytics API from the order tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=date.fromisoformat, help="First day to rebuild (YYYY-MM-DD)")
+        parser.add_argument("--end", type=date.fromisoformat, help="Last day to rebuild (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        days = rebuild_rollups(options["start"], options["end"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt sales rollups for {days} day(s)"))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.catalog_cache import invalidate_catalog_on_commit
+from core.models import Service
+from core.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = "Rebuild the stored rating aggregates on Service from the review table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("service_ids", nargs="*", type=int, help="Only rebuild these services")
+
+    def handle(self, *args, **options):
+        services = Service.objects.all()
+        if options["service_ids"]:
+            services = services.filter(pk__in=options["service_ids"])
+        with transaction.atomic():
+            updated = rebuild_ratings(services)
+            invalidate_catalog_on_commit()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt ratings for {updated} service(s)"))
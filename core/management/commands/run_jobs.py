@@ -0,0 +1,61 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.jobs import purge_finished, requeue_dead, work, worker_id
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (order confirmations, payment receipts). Retries failures with "
+        "exponential backoff and marks a job dead after JOB_MAX_ATTEMPTS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Run what is due and exit")
+        parser.add_argument("--interval", type=float, default=1.0, help="Seconds to sleep when nothing is due")
+        parser.add_argument("--limit", type=int, default=100, help="Jobs per batch and thread")
+        parser.add_argument("--queue", action="append", help="Only run these queues (default: all)")
+        parser.add_argument("--threads", type=int, default=1,
+                            help="Jobs run at once by this worker; JOB_QUEUES still caps each queue")
+        parser.add_argument("--requeue-dead", action="store_true", help="Queue the dead jobs again and exit")
+        parser.add_argument("--purge-days", type=int, help="Delete jobs that finished more than this many days ago")
+
+    def handle(self, *args, **options):
+        if options["requeue_dead"]:
+            self.stdout.write(f"Requeued {requeue_dead()} dead jobs")
+            return
+        if options["purge_days"] is not None:
+            self.stdout.write(f"Purged {purge_finished(options['purge_days'])} finished jobs")
+
+        threads = [
+            threading.Thread(target=self.thread_loop, args=(f"{worker_id()}:{n}", options), daemon=True)
+            for n in range(1, options["threads"])
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            self.loop(f"{worker_id()}:0", options)
+        except KeyboardInterrupt:
+            return
+        for thread in threads:
+            thread.join()
+
+    def thread_loop(self, worker, options):
+        try:
+            self.loop(worker, options)
+        finally:
+            connection.close()  # each thread has its own connection
+
+    def loop(self, worker, options):
+        while True:
+            counts = work(queues=options["queue"], limit=options["limit"], worker=worker)
+            if counts:
+                summary = ", ".join(f"{outcome}={n}" for outcome, n in sorted(counts.items()))
+                self.stdout.write(f"[{worker}] Ran jobs: {summary}")
+            if options["once"]:
+                return
+            if not counts:
+                time.sleep(options["interval"])
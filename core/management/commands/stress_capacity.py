@@ -0,0 +1,103 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from core.capacity import CapacityError
+from core.cart import apply_cart_operations
+from core.checkout import place_order
+from core.models import OrderItem, Service, ServiceSlot
+
+
+class Command(BaseCommand):
+    help = (
+        "Race concurrent checkouts (one thread and user each) for a single capacity-limited service against "
+        "a throwaway SQLite file. Fails if the service ends up overbooked."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--checkouts", type=int, default=100, help="Parallel checkouts")
+        parser.add_argument("--capacity", type=int, default=25, help="Units bookable on the day")
+        parser.add_argument("--quantity", type=int, default=1, help="Units per checkout")
+        parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+        parser.add_argument("--run", action="store_true", help="Run against the configured database (internal)")
+
+    def handle(self, *args, **options):
+        if options["run"]:
+            self.stdout.write(json.dumps(self.run(options)))
+            return
+
+        command = [
+            sys.executable, str(Path(settings.BASE_DIR) / "manage.py"), "stress_capacity", "--run",
+            "--checkouts", str(options["checkouts"]), "--capacity", str(options["capacity"]),
+            "--quantity", str(options["quantity"]),
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {**os.environ, "SQLITE_PATH": str(Path(tmp) / "stress.sqlite3"), "DATABASE_URL": ""}
+            output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(result))
+        else:
+            self.stdout.write(
+                f"{result['checkouts']} checkouts for {result['capacity']} units: {result['ok']} booked, "
+                f"{result['full']} fully booked, {result['errors']} errors; slot reserved {result['reserved']}, "
+                f"order lines holding {result['booked']}"
+            )
+        if result["reserved"] > result["capacity"] or result["reserved"] != result["booked"]:
+            raise CommandError("Service overbooked")
+
+    def run(self, options):
+        call_command("migrate", verbosity=0)
+        User = get_user_model()
+        service = Service.objects.create(
+            name="Limited", description="", price=Decimal("25.00"), daily_capacity=options["capacity"]
+        )
+        users = User.objects.bulk_create(User(username=f"stress{i}") for i in range(options["checkouts"]))
+        for user in users:
+            apply_cart_operations(user, [{"service_id": service.pk, "quantity": options["quantity"]}])
+        day = timezone.localdate()
+
+        outcomes, lock = {"ok": 0, "full": 0, "errors": 0}, threading.Lock()
+        start = threading.Barrier(len(users))
+
+        def checkout(user):
+            try:
+                start.wait()
+                try:
+                    place_order(user, day)
+                    outcome = "ok"
+                except CapacityError:
+                    outcome = "full"
+                except OperationalError:
+                    outcome = "errors"
+                with lock:
+                    outcomes[outcome] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=checkout, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        slot = ServiceSlot.objects.get(service=service, day=day)
+        booked = OrderItem.objects.filter(slot=slot, order__capacity_held=True).aggregate(n=Sum("quantity"))["n"]
+        return {
+            "checkouts": len(users), "capacity": slot.capacity, **outcomes,
+            "reserved": slot.reserved, "booked": booked or 0,
+        }
@@ -0,0 +1,266 @@
+# core/metrics.py
+import contextvars
+import functools
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from rest_framework import permissions
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.views import APIView
+
+logger = logging.getLogger("core.metrics")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+# anything else (e.g. a made-up verb) is labelled "other" so the series count stays bounded
+METHODS = frozenset({"GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE"})
+
+_current = contextvars.ContextVar("request_stats", default=None)
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram: per-bucket counts, sum and count."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """In-process metrics store shared by all requests of a worker."""
+
+    HISTOGRAMS = {
+        "request_duration_seconds": ("Wall time per request", LATENCY_BUCKETS),
+        "request_db_queries": ("Database queries per request", QUERY_BUCKETS),
+        "request_db_duration_seconds": ("Time spent in database calls per request", LATENCY_BUCKETS),
+        "request_serializer_duration_seconds": ("Time spent producing serializer.data per request", LATENCY_BUCKETS),
+    }
+    COUNTERS = {
+        "requests_total": "Requests by view, method and status",
+        "slow_queries_total": "Queries slower than METRICS_SLOW_QUERY_MS",
+        "duplicate_queries_total": "Statements repeated at least METRICS_DUPLICATE_QUERY_THRESHOLD times in one request",
+    }
+
+    def __init__(self, prefix="household_"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {name: {} for name in self.HISTOGRAMS}
+            self.counters = {name: defaultdict(int) for name in self.COUNTERS}
+
+    def observe(self, name, labels, value):
+        with self._lock:
+            series = self.histograms[name]
+            if labels not in series:
+                series[labels] = Histogram(self.HISTOGRAMS[name][1])
+            series[labels].observe(value)
+
+    def inc(self, name, labels, amount=1):
+        with self._lock:
+            self.counters[name][labels] += amount
+
+    def render(self):
+        """The Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            for name, (help_text, buckets) in self.HISTOGRAMS.items():
+                metric = self.prefix + name
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+                for labels, histogram in sorted(self.histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip((*buckets, "+Inf"), histogram.counts):
+                        cumulative += count
+                        lines.append(f"{metric}_bucket{_labels(labels + (('le', bound),))} {cumulative}")
+                    lines.append(f"{metric}_sum{_labels(labels)} {histogram.sum:.6f}")
+                    lines.append(f"{metric}_count{_labels(labels)} {histogram.count}")
+            for name, help_text in self.COUNTERS.items():
+                metric = self.prefix + name
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+                for labels, value in sorted(self.counters[name].items()):
+                    lines.append(f"{metric}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+registry = Registry()
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.statements = Counter()
+        self.slow = []
+
+
+class MetricsMiddleware:
+    """
+    Records wall time, query count, DB time and serializer time (for views
+    using ``SerializerTimingMixin``) for every request, labelled by the
+    resolved URL name and HTTP method, into ``registry``.
+
+    Optionally logs queries slower than ``METRICS_SLOW_QUERY_MS`` and
+    statements repeated ``METRICS_DUPLICATE_QUERY_THRESHOLD`` or more times in
+    one request (the usual signature of an N+1 loop).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        wrapper = self._query_wrapper(stats, getattr(settings, "METRICS_SLOW_QUERY_MS", None))
+        wrapped = []
+        try:
+            self._wrap(wrapper, wrapped)
+            started = time.perf_counter()
+            response = self.get_response(request)
+            elapsed = time.perf_counter() - started
+        finally:
+            self._unwrap(wrapper, wrapped)
+            _current.reset(token)
+        self.record(request, response, stats, elapsed)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        wrapper = self._query_wrapper(stats, getattr(settings, "METRICS_SLOW_QUERY_MS", None))
+        wrapped = []
+        try:
+            # connections are per thread, and under ASGI the request's ORM calls all run in one
+            # thread-sensitive worker thread, so the wrapper has to be installed from there
+            await sync_to_async(self._wrap)(wrapper, wrapped)
+            started = time.perf_counter()
+            response = await self.get_response(request)
+            elapsed = time.perf_counter() - started
+        finally:
+            await sync_to_async(self._unwrap)(wrapper, wrapped)
+            _current.reset(token)
+        self.record(request, response, stats, elapsed)
+        return response
+
+    def _wrap(self, wrapper, wrapped):
+        for connection in connections.all():
+            connection.execute_wrappers.append(wrapper)
+            wrapped.append(connection)
+
+    def _unwrap(self, wrapper, wrapped):
+        for connection in wrapped:
+            connection.execute_wrappers.remove(wrapper)
+
+    def _query_wrapper(self, stats, slow_query_ms):
+        def wrapper(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                duration = time.perf_counter() - started
+                stats.queries += 1
+                stats.db_time += duration
+                stats.statements[sql] += 1
+                if slow_query_ms is not None and duration * 1000 >= slow_query_ms:
+                    stats.slow.append((duration, sql))
+        return wrapper
+
+    def record(self, request, response, stats, elapsed):
+        match = request.resolver_match
+        # URL pattern names come from the URLconf, so both labels take a fixed set of values
+        view = match.view_name if match else "unmatched"
+        method = request.method if request.method in METHODS else "other"
+        labels = (("view", view), ("method", method))
+        registry.inc("requests_total", labels + (("status", response.status_code),))
+        registry.observe("request_duration_seconds", labels, elapsed)
+        registry.observe("request_db_queries", labels, stats.queries)
+        registry.observe("request_db_duration_seconds", labels, stats.db_time)
+        registry.observe("request_serializer_duration_seconds", labels, stats.serializer_time)
+
+        for duration, sql in stats.slow:
+            registry.inc("slow_queries_total", (("view", view),))
+            logger.warning("Slow query (%.1f ms) in %s %s: %s", duration * 1000, request.method, view, sql)
+        threshold = getattr(settings, "METRICS_DUPLICATE_QUERY_THRESHOLD", None)
+        if threshold:
+            for sql, count in stats.statements.items():
+                if count >= threshold:
+                    registry.inc("duplicate_queries_total", (("view", view),))
+                    logger.warning("Possible N+1: %d identical queries in %s %s: %s",
+                                   count, request.method, view, sql)
+
+
+class TimedDataMixin:
+    """``data`` that adds its wall time to the current request's serializer time."""
+
+    @property
+    def data(self):
+        stats = _current.get()
+        if stats is None:
+            return super().data
+        started = time.perf_counter()
+        try:
+            return super().data
+        finally:
+            stats.serializer_time += time.perf_counter() - started
+
+
+@functools.cache
+def _timed(serializer_class):
+    return type(serializer_class.__name__, (TimedDataMixin, serializer_class), {
+        "__module__": serializer_class.__module__, "__qualname__": serializer_class.__qualname__,
+    })
+
+
+class SerializerTimingMixin:
+    """
+    View mixin: serializers handed out by ``get_serializer`` (the outer
+    ``ListSerializer`` for ``many=True``) time their ``data`` into the
+    request's stats. Nested serializers render through to_representation,
+    so only the outermost one is counted.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if _current.get() is not None and not isinstance(serializer, TimedDataMixin):
+            serializer.__class__ = _timed(type(serializer))
+        return serializer
+
+
+class MetricsView(APIView):
+    """Prometheus scrape endpoint, restricted to admins."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if getattr(request.user, "role", "client") != "admin":
+            raise PermissionDenied("Only admins can read metrics")
+        return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
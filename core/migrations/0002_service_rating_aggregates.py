@@ -0,0 +1,73 @@
+# Generated by Django 5.2.5 on 2026-10-17 17:55
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_ratings(apps, schema_editor):
+    Service = apps.get_model("core", "Service")
+    Review = apps.get_model("core", "Review")
+    stats = {}
+    rows = Review.objects.order_by().values("service_id", "rating").annotate(n=Count("id"))
+    for row in rows:
+        service = stats.setdefault(row["service_id"], Service(pk=row["service_id"]))
+        if 1 <= row["rating"] <= 5:
+            setattr(service, f"rating_{row['rating']}", row["n"])
+        service.rating_count += row["n"]
+        service.rating_sum += row["rating"] * row["n"]
+    for service in stats.values():
+        service.rating = service.rating_sum / service.rating_count
+    fields = ["rating", "rating_count", "rating_sum", "rating_1", "rating_2", "rating_3", "rating_4", "rating_5"]
+    Service.objects.bulk_update(stats.values(), fields, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='service',
+            name='rating_1',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='rating_2',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='rating_3',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='rating_4',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='rating_5',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='rating',
+            field=models.IntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)]),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
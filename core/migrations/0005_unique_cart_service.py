@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:01
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_lines(apps, schema_editor):
+    CartItem = apps.get_model("core", "CartItem")
+    duplicates = (
+        CartItem.objects.order_by().values("cart_id", "service_id")
+        .annotate(lines=Count("id"), keep=Min("id"), total=Sum("quantity"))
+        .filter(lines__gt=1)
+    )
+    for dup in duplicates:
+        lines = CartItem.objects.filter(cart_id=dup["cart_id"], service_id=dup["service_id"])
+        lines.exclude(pk=dup["keep"]).delete()
+        lines.filter(pk=dup["keep"]).update(quantity=dup["total"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_order_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_lines, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'service'), name='unique_cart_service'),
+        ),
+    ]
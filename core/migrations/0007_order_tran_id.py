@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_query_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='tran_id',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_order_tran_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('success', 'Success'), ('fail', 'Fail'), ('cancel', 'Cancel'), ('ipn', 'IPN')], max_length=10)),
+                ('tran_id', models.CharField(blank=True, max_length=64)),
+                ('payload', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('received', 'Received'), ('processing', 'Processing'), ('settled', 'Settled'), ('duplicate', 'Duplicate'), ('rejected', 'Rejected'), ('error', 'Error')], default='received', max_length=12)),
+                ('detail', models.TextField(blank=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'id'], name='paynotif_status_id_idx'), models.Index(fields=['tran_id'], name='paynotif_tran_id_idx')],
+            },
+        ),
+    ]
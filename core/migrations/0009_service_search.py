@@ -0,0 +1,82 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:30
+
+import core.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Later migrations that make SQLite rebuild core_service must recreate these (see 0010).
+SQLITE_TRIGGERS = [
+    "CREATE TRIGGER core_service_fts_insert AFTER INSERT ON core_service BEGIN "
+    "INSERT INTO core_service_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER core_service_fts_delete AFTER DELETE ON core_service BEGIN "
+    "INSERT INTO core_service_fts(core_service_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); END",
+    # only text changes touch the index, not the frequent rating counter updates
+    "CREATE TRIGGER core_service_fts_update AFTER UPDATE OF name, description ON core_service BEGIN "
+    "INSERT INTO core_service_fts(core_service_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO core_service_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+]
+SQLITE_FORWARD = [
+    # external-content table: the text lives in core_service, FTS5 only keeps the index
+    "CREATE VIRTUAL TABLE core_service_fts USING fts5("
+    "name, description, content='core_service', content_rowid='id', "
+    "prefix='2 3', tokenize='unicode61 remove_diacritics 2')",
+    "INSERT INTO core_service_fts(core_service_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')",
+    *SQLITE_TRIGGERS,
+    "INSERT INTO core_service_fts(core_service_fts) VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS core_service_fts_insert",
+    "DROP TRIGGER IF EXISTS core_service_fts_delete",
+    "DROP TRIGGER IF EXISTS core_service_fts_update",
+    "DROP TABLE IF EXISTS core_service_fts",
+]
+
+
+def _postgres_index(apps):
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    # must match the vector built in core.search so the planner can use it
+    vector = SearchVector("name", weight="A", config="simple") + SearchVector("description", weight="B", config="simple")
+    return apps.get_model("core", "Service"), GinIndex(vector, name="service_search_gin")
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in SQLITE_FORWARD:
+            schema_editor.execute(sql)
+    elif schema_editor.connection.vendor == "postgresql":
+        schema_editor.add_index(*_postgres_index(apps))
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in SQLITE_BACKWARD:
+            schema_editor.execute(sql)
+    elif schema_editor.connection.vendor == "postgresql":
+        schema_editor.remove_index(*_postgres_index(apps))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_payment_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServiceSearchIndex',
+            fields=[
+                ('service', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='fts', serialize=False, to='core.service')),
+                ('document', core.models.SearchDocumentField(db_column='core_service_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'core_service_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:34
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+search_index = import_module("core.migrations.0009_service_search")
+
+
+def recreate_search_triggers(apps, schema_editor):
+    """SQLite rebuilds core_service to add a column, which drops the FTS triggers from 0009."""
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in search_index.SQLITE_BACKWARD[:3] + search_index.SQLITE_TRIGGERS:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_service_search'),
+    ]
+
+    operations = [
+        # reversing the AddField rebuilds the table as well
+        migrations.RunPython(migrations.RunPython.noop, recreate_search_triggers),
+        migrations.AddField(
+            model_name='service',
+            name='category',
+            field=models.CharField(choices=[('cleaning', 'Cleaning'), ('plumbing', 'Plumbing'), ('electrical', 'Electrical'), ('painting', 'Painting'), ('gardening', 'Gardening'), ('moving', 'Moving'), ('repair', 'Repair'), ('pest_control', 'Pest control'), ('laundry', 'Laundry'), ('cooking', 'Cooking'), ('other', 'Other')], default='other', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['category', 'rating', 'id'], name='service_cat_rating_id_idx'),
+        ),
+        migrations.RunPython(recreate_search_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def backfill(apps, schema_editor):
+    """Roll up the existing orders; the incremental updates assume every order is already counted."""
+    Order, OrderItem = apps.get_model("core", "Order"), apps.get_model("core", "OrderItem")
+    DailySales, DailyServiceSales = apps.get_model("core", "DailySales"), apps.get_model("core", "DailyServiceSales")
+    paid = Q(payment_status="paid")
+    daily = Order.objects.annotate(day=TruncDate("created_at")).order_by().values("day").annotate(
+        orders=Count("id"), paid=Count("id", filter=paid), failed=Count("id", filter=Q(payment_status="failed")),
+        revenue=Coalesce(Sum("total_amount", filter=paid), Value(0, output_field=DecimalField())),
+    )
+    DailySales.objects.bulk_create((DailySales(**row) for row in daily), batch_size=1000)
+    lines = OrderItem.objects.filter(order__payment_status="paid").annotate(
+        day=TruncDate("order__created_at")
+    ).order_by().values("day", "service_id").annotate(
+        q=Sum("quantity"), r=Sum(F("quantity") * F("price_at_purchase"), output_field=DecimalField()),
+        n=Count("order_id", distinct=True),
+    )
+    DailyServiceSales.objects.bulk_create(
+        (DailyServiceSales(day=row["day"], service_id=row["service_id"], quantity=row["q"], revenue=row["r"],
+                           orders=row["n"]) for row in lines.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_service_category'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('paid', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyServiceSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='core.service')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'service'), name='unique_day_service')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
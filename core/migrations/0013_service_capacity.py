@@ -0,0 +1,52 @@
+# Generated by Django 5.2.5 on 2026-10-17 19:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='capacity_held',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='service_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='daily_capacity',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ServiceSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('capacity', models.PositiveIntegerField()),
+                ('reserved', models.PositiveIntegerField(default=0)),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='core.service')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='slot',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='items', to='core.serviceslot'),
+        ),
+        migrations.AddConstraint(
+            model_name='serviceslot',
+            constraint=models.UniqueConstraint(fields=('service', 'day'), name='unique_service_day_slot'),
+        ),
+        migrations.AddConstraint(
+            model_name='serviceslot',
+            constraint=models.CheckConstraint(condition=models.Q(('reserved__lte', models.F('capacity'))), name='slot_not_overbooked'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-17 19:21
+
+import time
+
+from django.db import migrations, models
+
+
+def create_row(apps, schema_editor):
+    apps.get_model("core", "CatalogVersion").objects.create(pk=1, version=time.time_ns())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_payment_attempts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+                ('modified', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(create_row, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-17 19:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_catalog_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobQueue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+        ),
+    ]
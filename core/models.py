@@ -1,7 +1,9 @@
 # core/models.py
 from django.contrib.auth.models import AbstractUser
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 # ------------------ Custom User ------------------
 class User(AbstractUser):
@@ -21,16 +23,60 @@ User = settings.AUTH_USER_MODEL  # For ForeignKeys below
 
 # ------------------ Service ------------------
 class Service(models.Model):
+    CATEGORY_CHOICES = (
+        ("cleaning", "Cleaning"),
+        ("plumbing", "Plumbing"),
+        ("electrical", "Electrical"),
+        ("painting", "Painting"),
+        ("gardening", "Gardening"),
+        ("moving", "Moving"),
+        ("repair", "Repair"),
+        ("pest_control", "Pest control"),
+        ("laundry", "Laundry"),
+        ("cooking", "Cooking"),
+        ("other", "Other"),
+    )
     name = models.CharField(max_length=100)
+    category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default="other")
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
-    rating = models.FloatField(default=0)
+    rating = models.FloatField(default=0)  # average of reviews, kept in sync by core.ratings
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    # histogram of reviews per star
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+    # units bookable per day unless a ServiceSlot says otherwise; null = unlimited
+    daily_capacity = models.PositiveIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # keyset pagination for each ordering exposed by ServiceViewSet
+        indexes = [
+            models.Index(fields=["rating", "id"], name="service_rating_id_idx"),
+            models.Index(fields=["price", "id"], name="service_price_id_idx"),
+            models.Index(fields=["name", "id"], name="service_name_id_idx"),
+            # category-filtered pages in the default ordering
+            models.Index(fields=["category", "rating", "id"], name="service_cat_rating_id_idx"),
+        ]
+        constraints = [models.CheckConstraint(condition=models.Q(price__gte=0), name="service_price_non_negative")]
+
     def __str__(self):
         return self.name
 
 
+class CatalogVersion(models.Model):
+    """
+    Single row bumped on every catalog write (core.catalog_cache). Cache keys
+    and the services ETag derive from it, so all workers agree on it.
+    """
+    version = models.BigIntegerField(default=0)
+    modified = models.DateTimeField(null=True, blank=True)
+
+
 # ------------------ Cart ------------------
 class Cart(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="cart")
@@ -43,10 +89,13 @@ class Cart(models.Model):
 
 
 class CartItem(models.Model):
-    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name="items")
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name="items", db_index=False)  # unique_cart_service leads with cart
     service = models.ForeignKey(Service, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
 
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["cart", "service"], name="unique_cart_service")]
+
     def __str__(self):
         return f"{self.quantity} x {self.service.name}"
 
@@ -54,11 +103,21 @@ class CartItem(models.Model):
 # ------------------ Review ------------------
 class Review(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name="reviews")
-    rating = models.IntegerField()  # 1..5
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name="reviews", db_index=False)
+    rating = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
     comment = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="review_created_id_idx"),
+            # covers per-service rating aggregates and replaces the plain service FK index
+            models.Index(fields=["service", "rating"], name="review_service_rating_idx"),
+        ]
+        constraints = [
+            models.CheckConstraint(condition=models.Q(rating__gte=1, rating__lte=5), name="review_rating_range"),
+        ]
+
     def __str__(self):
         try:
             return f"{self.user.username} - {self.service.name} ({self.rating})"
@@ -66,6 +125,28 @@ class Review(models.Model):
             return f"Review {self.pk}"
 
 
+# ------------------ Capacity ------------------
+class ServiceSlot(models.Model):
+    """
+    Bookable units of a service on one day. Created from ``Service.daily_capacity``
+    on first booking, or by an admin to override it. ``reserved`` only changes
+    through the conditional UPDATEs in core.capacity.
+    """
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name="slots")
+    day = models.DateField()
+    capacity = models.PositiveIntegerField()
+    reserved = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["service", "day"], name="unique_service_day_slot"),
+            models.CheckConstraint(condition=models.Q(reserved__lte=models.F("capacity")), name="slot_not_overbooked"),
+        ]
+
+    def __str__(self):
+        return f"{self.service_id} on {self.day}: {self.reserved}/{self.capacity}"
+
+
 # ------------------ Order ------------------
 class Order(models.Model):
     STATUS_CHOICES = (
@@ -79,7 +160,7 @@ class Order(models.Model):
         ('failed', 'Failed'),
     )
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)  # covered by the user-leading indexes
     name = models.CharField(max_length=255)   # For checkout form
     email = models.EmailField()
     phone = models.CharField(max_length=20)
@@ -88,7 +169,21 @@ class Order(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     payment_status = models.CharField(max_length=20, choices=PAYMENT_CHOICES, default='pending')
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    tran_id = models.CharField(max_length=64, unique=True, null=True, blank=True)  # latest gateway transaction
+    service_date = models.DateField(null=True, blank=True)  # the day the services are booked for
+    capacity_held = models.BooleanField(default=False)  # its lines hold ServiceSlot capacity (core.capacity)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # bulk .update() calls must set this explicitly
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="order_created_id_idx"),
+            models.Index(fields=["user", "created_at", "id"], name="order_user_created_id_idx"),
+            models.Index(fields=["user", "updated_at"], name="order_user_updated_idx"),
+        ]
+        constraints = [
+            models.CheckConstraint(condition=models.Q(total_amount__gte=0), name="order_total_non_negative"),
+        ]
 
     def __str__(self):
         return f"Order {self.id} by {self.name}"
@@ -99,6 +194,167 @@ class OrderItem(models.Model):
     service = models.ForeignKey(Service, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
     price_at_purchase = models.DecimalField(max_digits=10, decimal_places=2)
+    slot = models.ForeignKey("ServiceSlot", on_delete=models.PROTECT, null=True, blank=True, related_name="items")
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(condition=models.Q(quantity__gte=1), name="orderitem_quantity_positive"),
+            models.CheckConstraint(condition=models.Q(price_at_purchase__gte=0), name="orderitem_price_non_negative"),
+        ]
+
+
+# ------------------ Service search ------------------
+class SearchDocumentField(models.TextField):
+    """FTS5's hidden column named after the table; only used as the left side of MATCH."""
+
+
+@SearchDocumentField.register_lookup
+class Match(models.Lookup):
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", [*lhs_params, *rhs_params]
+
+
+class ServiceSearchIndex(models.Model):
+    """
+    The SQLite FTS5 table over Service name/description, kept in sync by the
+    triggers from migration 0009. ``rank`` is bm25 with name weighted 10x;
+    lower is better. See core.search.
+    """
+    service = models.OneToOneField(
+        Service, on_delete=models.DO_NOTHING, primary_key=True, db_column="rowid", related_name="fts"
+    )
+    document = SearchDocumentField(db_column="core_service_fts")
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "core_service_fts"
+
+
+# ------------------ Payment notifications ------------------
+class PaymentNotification(models.Model):
+    """Raw gateway callback, stored as received and settled later by the payment worker."""
+    KIND_CHOICES = (
+        ('success', 'Success'),
+        ('fail', 'Fail'),
+        ('cancel', 'Cancel'),
+        ('ipn', 'IPN'),
+    )
+    STATUS_CHOICES = (
+        ('received', 'Received'),
+        ('processing', 'Processing'),
+        ('settled', 'Settled'),
+        ('duplicate', 'Duplicate'),
+        ('rejected', 'Rejected'),
+        ('error', 'Error'),
+    )
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    tran_id = models.CharField(max_length=64, blank=True)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default='received')
+    detail = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    received_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)  # when a worker took it; see requeue_stale
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "id"], name="paynotif_status_id_idx"),
+            models.Index(fields=["tran_id"], name="paynotif_tran_id_idx"),
+        ]
 
-    def line_total(self):
-        return self.quantity * self.price_at_purchase
+    def __str__(self):
+        return f"{self.kind} {self.tran_id} ({self.status})"
+
+
+class PaymentAttempt(models.Model):
+    """
+    One gateway session of an order. ``Order.tran_id`` is only the latest, so
+    callbacks for earlier sessions are matched to their order through these.
+    """
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="payment_attempts")
+    tran_id = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.tran_id} (order {self.order_id})"
+
+
+# ------------------ Sales analytics ------------------
+# Rollups keyed by the local date the order was placed, maintained by core.analytics
+# on checkout and payment changes and rebuilt from the orders by `rebuild_analytics`.
+class DailySales(models.Model):
+    """Orders placed on ``day``, with how many of them are currently paid or failed."""
+    day = models.DateField(unique=True)
+    orders = models.PositiveIntegerField(default=0)
+    paid = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # sum of paid order totals
+
+    def __str__(self):
+        return f"{self.day}: {self.paid}/{self.orders} paid"
+
+
+class DailyServiceSales(models.Model):
+    """Paid order lines per service for the orders placed on ``day``."""
+    day = models.DateField()
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name="daily_sales")
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    orders = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["day", "service"], name="unique_day_service")]
+
+    def __str__(self):
+        return f"{self.day} {self.service_id}: {self.revenue}"
+
+
+# ------------------ Background jobs ------------------
+class Job(models.Model):
+    """A call to a ``core.jobs`` task, queued in the database and run by the ``run_jobs`` worker."""
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('dead', 'Dead'),  # out of attempts; kept for inspection and `run_jobs --requeue-dead`
+    )
+
+    task = models.CharField(max_length=200)
+    queue = models.CharField(max_length=50, default='default')
+    payload = models.JSONField(default=dict)  # keyword arguments for the task
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)  # not before; pushed back on each retry
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # due jobs per queue (status='queued', run_at <= now) and running counts per queue
+            models.Index(fields=["status", "queue", "run_at"], name="job_status_queue_run_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+
+class JobQueue(models.Model):
+    """
+    One row per job queue, locked by ``core.jobs`` while it claims a job, so
+    claims on a queue take turns and each sees the running count the others left.
+    """
+    name = models.CharField(max_length=50, unique=True)
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,35 @@
+# core/orders.py
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .capacity import release_orders
+from .models import Order
+
+# status -> the statuses an order in it may be moved to
+TRANSITIONS = {"pending": {"completed", "cancelled"}}
+TARGETS = sorted(set().union(*TRANSITIONS.values()))
+# status -> (orders that may not move to it whatever their status, why)
+BLOCKED = {"completed": (Q(payment_status="failed"), "have a failed payment")}  # their booking was released
+
+
+@transaction.atomic
+def transition(orders, status, limit=None):
+    """
+    Move those of ``orders`` (a queryset) whose status allows it to ``status``
+    with one set-based UPDATE; returns the ids that changed, at most ``limit``.
+
+    The ids are read with the rows locked, so they are exactly the rows the
+    UPDATE changes. Cancelled orders give their booked capacity back.
+    """
+    sources = [old for old, targets in TRANSITIONS.items() if status in targets]
+    movable = orders.filter(status__in=sources).select_for_update(of=("self",)).order_by("pk")
+    if status in BLOCKED:
+        movable = movable.exclude(BLOCKED[status][0])
+    ids = list(movable.values_list("pk", flat=True)[:limit])
+    if not ids:
+        return []
+    if status == "cancelled":
+        release_orders(Order.objects.filter(pk__in=ids))
+    Order.objects.filter(pk__in=ids).update(status=status, updated_at=timezone.now())
+    return ids
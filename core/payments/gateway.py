@@ -0,0 +1,136 @@
+# core/payments/gateway.py
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+
+class GatewayError(Exception):
+    pass
+
+
+class GatewayUnavailable(GatewayError):
+    """The gateway could not be reached (retries exhausted or circuit open)."""
+
+
+class CircuitBreaker:
+    """Open after ``failure_threshold`` consecutive failures; let one probe through after ``reset_timeout`` seconds."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "half-open":
+                # only one probe at a time: push the window forward until it reports back
+                self.opened_at = time.monotonic()
+            return state != "open"
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class SSLCommerzClient:
+    """
+    Pooled, keep-alive client for the SSLCommerz session API.
+
+    Every call has connect/read timeouts. Connection errors, timeouts and
+    5xx/429 responses are retried with exponential backoff up to
+    ``max_retries`` times, and all of them count towards the circuit breaker.
+    """
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, api_url, store_id, store_passwd, connect_timeout=3.05, read_timeout=10,
+                 max_retries=2, backoff=0.5, pool_size=10, breaker=None, validation_url=None):
+        self.api_url = api_url
+        self.validation_url = validation_url
+        self.store_id = store_id
+        self.store_passwd = store_passwd
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _request(self, method, url, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            if not self.breaker.allow():
+                raise GatewayUnavailable("Payment gateway circuit is open")
+            try:
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.breaker.record_failure()
+                continue
+            if response.status_code in self.RETRY_STATUSES:
+                self.breaker.record_failure()
+                continue
+            self.breaker.record_success()
+            return response
+        raise GatewayUnavailable(f"Payment gateway unreachable after {self.max_retries + 1} attempts")
+
+    def init_payment(self, **fields):
+        """Open a gateway session; returns the decoded SSLCommerz response."""
+        data = {"store_id": self.store_id, "store_passwd": self.store_passwd, **fields}
+        return self._json(self._request("POST", self.api_url, data=data))
+
+    def validate(self, val_id):
+        """Ask the validation API about a ``val_id`` from a success/IPN callback."""
+        params = {"val_id": val_id, "store_id": self.store_id, "store_passwd": self.store_passwd, "format": "json"}
+        return self._json(self._request("GET", self.validation_url, params=params))
+
+    def _json(self, response):
+        try:
+            return response.json()
+        except ValueError:
+            raise GatewayError(f"SSLCommerz returned a non-JSON response: {response.text[:200]}")
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide client, so the connection pool and breaker are shared across requests."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SSLCommerzClient(
+                settings.SSLCZ_API_URL,
+                settings.SSLCZ_STORE_ID,
+                settings.SSLCZ_STORE_PASS,
+                connect_timeout=settings.SSLCZ_CONNECT_TIMEOUT,
+                read_timeout=settings.SSLCZ_READ_TIMEOUT,
+                max_retries=settings.SSLCZ_MAX_RETRIES,
+                backoff=settings.SSLCZ_RETRY_BACKOFF,
+                breaker=CircuitBreaker(settings.SSLCZ_BREAKER_THRESHOLD, settings.SSLCZ_BREAKER_RESET),
+                validation_url=settings.SSLCZ_VALIDATION_URL,
+            )
+        return _client
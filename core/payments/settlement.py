@@ -0,0 +1,169 @@
+# core/payments/settlement.py
+import logging
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.analytics import payment_changed
+from core.capacity import CapacityError, order_changed
+from core.models import Order, PaymentNotification
+from core.tasks import send_payment_receipt
+from .gateway import GatewayError, get_client
+
+logger = logging.getLogger(__name__)
+
+VALID_STATUSES = {"VALID", "VALIDATED"}
+ORDER_FIELDS = ("id", "tran_id", "total_amount", "payment_status", "status", "capacity_held", "service_date", "created_at")
+
+
+def record_notification(kind, payload):
+    """Store a gateway callback as-is; all validation happens in the worker."""
+    return PaymentNotification.objects.create(kind=kind, tran_id=str(payload.get("tran_id", ""))[:64], payload=payload)
+
+
+def _claim(notification):
+    """Move a notification to ``processing``; False if another worker got it first."""
+    return PaymentNotification.objects.filter(pk=notification.pk, status="received").update(
+        status="processing", attempts=F("attempts") + 1, claimed_at=timezone.now()
+    ) == 1
+
+
+def _finish(notification, status, detail=""):
+    PaymentNotification.objects.filter(pk=notification.pk).update(
+        status=status, detail=detail, processed_at=timezone.now()
+    )
+    return status
+
+
+def _retry(notification, detail):
+    """Leave the notification for the next pass, unless it has been tried enough."""
+    if notification.attempts >= settings.PAYMENT_WORKER_MAX_ATTEMPTS:
+        return _finish(notification, "error", detail)
+    PaymentNotification.objects.filter(pk=notification.pk).update(status="received", detail=detail)
+    return "received"
+
+
+def _find_order(tran_id):
+    """The order a gateway session belongs to: the latest is ``Order.tran_id``, earlier ones are PaymentAttempts."""
+    if not tran_id:
+        return None
+    return (
+        Order.objects.filter(tran_id=tran_id).only(*ORDER_FIELDS).first()
+        or Order.objects.filter(payment_attempts__tran_id=tran_id).only(*ORDER_FIELDS).first()
+    )
+
+
+def _check_validation(tran_id, order, result):
+    if result.get("status") not in VALID_STATUSES:
+        return f"gateway status {result.get('status')!r}"
+    if result.get("tran_id") != tran_id:
+        return "tran_id mismatch"
+    try:
+        amount = Decimal(str(result.get("amount")))
+    except InvalidOperation:
+        return "missing amount"
+    if amount != order.total_amount or result.get("currency", "BDT") != "BDT":
+        return f"amount {result.get('amount')} {result.get('currency')} does not match order total"
+    return None
+
+
+def settle(notification, client=None):
+    """
+    Settle one claimed notification against the order of its ``tran_id``;
+    returns the final status.
+
+    A fail/cancel only fails a pending order, and only for its latest session,
+    since the customer may have moved on to a retry. A validated payment from
+    any session pays the order, also after a failed one (booking its capacity
+    again). Order updates are conditional on the state read here, so a replayed
+    or concurrent callback is a no-op and ends up as ``duplicate``.
+    """
+    order = _find_order(notification.tran_id)
+    if order is None:
+        return _finish(notification, "rejected", "unknown tran_id")
+    if order.payment_status == "paid":
+        return _finish(notification, "duplicate", "order already paid")
+
+    if notification.kind in ("fail", "cancel"):
+        if order.tran_id != notification.tran_id:
+            return _finish(notification, "duplicate", "superseded by a later payment attempt")
+        if order.payment_status != "pending":
+            return _finish(notification, "duplicate", f"order already {order.payment_status}")
+        new_state = {"payment_status": "failed"}
+    else:
+        if order.status == "cancelled":
+            return _finish(notification, "rejected", "order cancelled; the payment needs a refund")
+        val_id = notification.payload.get("val_id")
+        if not val_id:
+            return _finish(notification, "rejected", "missing val_id")
+        try:
+            result = (client or get_client()).validate(val_id)
+        except GatewayError as exc:
+            return _retry(notification, str(exc))
+        problem = _check_validation(notification.tran_id, order, result)
+        if problem:
+            return _finish(notification, "rejected", problem)
+        new_state = {"payment_status": "paid", "status": "completed"}
+
+    try:
+        with transaction.atomic():
+            settled = Order.objects.filter(
+                pk=order.pk, payment_status=order.payment_status, status=order.status
+            ).update(updated_at=timezone.now(), **new_state)
+            if settled:
+                old_status = order.payment_status
+                for field, value in new_state.items():
+                    setattr(order, field, value)
+                order_changed(order)
+                payment_changed(order, old_status)
+                if order.payment_status == "paid":
+                    send_payment_receipt.enqueue_on_commit(order_id=order.pk)
+            return _finish(notification, "settled" if settled else "duplicate")
+    except CapacityError as exc:  # paid after failing, and the day filled up meanwhile
+        return _finish(notification, "rejected", f"{exc}; the payment needs a refund")
+
+
+@transaction.atomic
+def reopen(order):
+    """Put a failed order back to pending for another payment attempt, booking its capacity again."""
+    if Order.objects.filter(pk=order.pk, payment_status="failed").update(
+        payment_status="pending", updated_at=timezone.now()
+    ):
+        order.payment_status = "pending"
+        order_changed(order)
+        payment_changed(order, "failed")
+
+
+def requeue_stale():
+    """Queue again the notifications whose worker died mid-settlement (``processing`` past PAYMENT_WORKER_TIMEOUT)."""
+    now = timezone.now()
+    stale = PaymentNotification.objects.filter(
+        Q(claimed_at__lt=now - timedelta(seconds=settings.PAYMENT_WORKER_TIMEOUT)) | Q(claimed_at__isnull=True),
+        status="processing",
+    )
+    parked = stale.filter(attempts__gte=settings.PAYMENT_WORKER_MAX_ATTEMPTS).update(
+        status="error", detail="worker timed out", processed_at=now
+    )
+    return parked + stale.update(status="received", detail="worker timed out")
+
+
+def process_pending(limit=100, client=None):
+    """Settle up to ``limit`` received notifications, oldest first; returns {status: count}."""
+    requeue_stale()
+    counts = {}
+    pending = PaymentNotification.objects.filter(status="received").order_by("id")[:limit]
+    for notification in pending:
+        if not _claim(notification):
+            continue
+        notification.attempts += 1
+        try:
+            status = settle(notification, client)
+        except Exception as exc:  # one bad notification must not stop the batch
+            logger.exception("Settling payment notification %s failed", notification.pk)
+            status = _retry(notification, repr(exc))
+        counts[status] = counts.get(status, 0) + 1
+    return counts
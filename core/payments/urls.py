@@ -1,6 +1,10 @@
 from django.urls import path
-from .views import create_order
+from .views import create_order, PaymentCallbackView
 
 urlpatterns = [
     path("order/", create_order, name="create_order"),
+    path("success/", PaymentCallbackView.as_view(kind="success"), name="payment-success"),
+    path("fail/", PaymentCallbackView.as_view(kind="fail"), name="payment-fail"),
+    path("cancel/", PaymentCallbackView.as_view(kind="cancel"), name="payment-cancel"),
+    path("ipn/", PaymentCallbackView.as_view(kind="ipn"), name="payment-ipn"),
 ]
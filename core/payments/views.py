@@ -1,49 +1,90 @@
-import requests
+import uuid
+
 from django.conf import settings
-from rest_framework.decorators import api_view
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.capacity import CapacityError
+from core.models import Order, PaymentAttempt
+from core.serializers import PaymentInitSerializer
+from .gateway import GatewayError, GatewayUnavailable, get_client
+from .settlement import record_notification, reopen
+
 
 @api_view(["POST"])
+@permission_classes([IsAuthenticated])
 def create_order(request):
     user = request.user
-    data = request.data  
-
-    # Use your live Render URL instead of localhost
-    base_url = "https://householdservice-2.onrender.com"
-
-    post_data = {
-        "store_id": settings.SSLCZ_STORE_ID,
-        "store_passwd": settings.SSLCZ_STORE_PASS,
-        "total_amount": 1000, 
-        "currency": "BDT",
-        "tran_id": "ORDER12345", 
-        "success_url": f"{base_url}/api/payment/success/",
-        "fail_url": f"{base_url}/api/payment/fail/",
-        "cancel_url": f"{base_url}/api/payment/cancel/",
-        "cus_name": user.username if user.is_authenticated else "Guest User",
-        "cus_email": getattr(user, 'email', 'customer@example.com'),
-        "cus_add1": data.get("address", "Dhaka"), 
-        "cus_phone": data.get("phone", "01700000000"), 
-        "shipping_method": "NO",
-        "product_name": data.get("service", "General Service"),
-        "product_category": "Household",
-        "product_profile": "general",
-    }
-
-    
-    response = requests.post(settings.SSLCZ_API_URL, data=post_data)
-    
+    serializer = PaymentInitSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+
+    order = get_object_or_404(Order, id=data["order_id"], user=user)
+    if order.payment_status == "paid":
+        return Response({"error": "Order is already paid"}, status=400)
+    if order.status == "cancelled":
+        return Response({"error": "Order is cancelled"}, status=400)
+
+    # A fresh id per attempt, so a retried payment never collides with an earlier gateway session;
+    # the earlier ids stay in PaymentAttempt so their late callbacks still find the order
+    tran_id = f"ORD{order.id}-{uuid.uuid4().hex[:12]}"
     try:
-        result = response.json()
-    except Exception as e:
-        return Response({"error": "SSLCommerz returned non-JSON response", "details": response.text}, status=500)
+        with transaction.atomic():
+            if order.payment_status == "failed":
+                reopen(order)  # a retry books the order again first
+            PaymentAttempt.objects.create(order=order, tran_id=tran_id)
+            order.tran_id = tran_id
+            order.save(update_fields=["tran_id", "updated_at"])
+    except CapacityError as e:
+        return Response({"error": "Fully booked", "details": str(e), "service_ids": sorted(e.service_ids)}, status=409)
+
+    base_url = settings.SSLCZ_CALLBACK_BASE_URL
+    try:
+        result = get_client().init_payment(
+            total_amount=str(order.total_amount),
+            currency="BDT",
+            tran_id=order.tran_id,
+            success_url=base_url + reverse("payment-success"),
+            fail_url=base_url + reverse("payment-fail"),
+            cancel_url=base_url + reverse("payment-cancel"),
+            ipn_url=base_url + reverse("payment-ipn"),
+            cus_name=order.name or user.username,
+            cus_email=order.email or user.email or "customer@example.com",
+            cus_add1=order.address or data["address"],
+            cus_phone=order.phone or data["phone"],
+            shipping_method="NO",
+            product_name=data["service"],
+            product_category="Household",
+            product_profile="general",
+        )
+    except GatewayUnavailable as e:
+        return Response({"error": "Payment gateway unavailable", "details": str(e)}, status=503)
+    except GatewayError as e:
+        return Response({"error": "Invalid response from payment gateway", "details": str(e)}, status=502)
 
     if result.get("status") == "SUCCESS":
-        return Response({"GatewayPageURL": result["GatewayPageURL"]})
+        return Response({"GatewayPageURL": result["GatewayPageURL"], "tran_id": order.tran_id})
     else:
-        
         return Response({
-            "error": "Failed to initiate payment", 
+            "error": "Failed to initiate payment",
             "details": result.get("failedreason", "Unknown error"),
             "full_response": result
-        }, status=400)
\ No newline at end of file
+        }, status=400)
+
+
+class PaymentCallbackView(APIView):
+    """Gateway success/fail/cancel/IPN callback: store it and answer immediately; the payment worker settles it."""
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    kind = None
+
+    def post(self, request):
+        data = request.data
+        payload = data.dict() if hasattr(data, "dict") else dict(data)
+        record_notification(self.kind, payload)
+        return Response({"detail": "Notification received"})
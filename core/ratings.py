@@ -0,0 +1,49 @@
+# core/ratings.py
+from django.db.models import Case, Count, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+
+from .models import Review, Service
+
+STARS = range(1, 6)
+
+
+def _apply(service_id, rating, sign):
+    count = F("rating_count") + sign
+    total = F("rating_sum") + sign * rating
+    # SET expressions see the pre-update row, so the average is derived from the new count/sum
+    Service.objects.filter(pk=service_id).update(
+        rating_count=count,
+        rating_sum=total,
+        rating=Case(
+            When(rating_count__gt=-sign, then=Cast(total, FloatField()) / count),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ),
+        **{f"rating_{rating}": F(f"rating_{rating}") + sign},
+    )
+
+
+def review_added(service_id, rating):
+    _apply(service_id, rating, 1)
+
+
+def review_removed(service_id, rating):
+    _apply(service_id, rating, -1)
+
+
+def rebuild_ratings(services=None):
+    """Recompute the stored rating aggregates from the review table in a single UPDATE."""
+    if services is None:
+        services = Service.objects.all()
+    reviews = Review.objects.filter(service=OuterRef("pk")).order_by().values("service")
+
+    def agg(expr, output_field=IntegerField(), default=0, **filters):
+        sub = reviews.filter(**filters).annotate(v=expr).values("v")
+        return Coalesce(Subquery(sub, output_field=output_field), Value(default))
+
+    return services.update(
+        rating_count=agg(Count("id")),
+        rating_sum=agg(Sum("rating")),
+        rating=agg(Cast(Sum("rating"), FloatField()) / Count("id"), FloatField(), 0.0),
+        **{f"rating_{star}": agg(Count("id"), rating=star) for star in STARS},
+    )
@@ -0,0 +1,60 @@
+# core/search.py
+import re
+
+from django.db import connection
+from django.db.models import ExpressionWrapper, F, FloatField, Q, Value
+
+MAX_TERMS = 8
+RATING_BOOST = 0.2  # a 5-star service scores 2x an unrated one with the same text relevance
+
+_TERM = re.compile(r"\w+")
+
+
+def search_terms(query):
+    """Lower-cased word tokens of a user query; punctuation and operators are dropped."""
+    return _TERM.findall(query.lower())[:MAX_TERMS]
+
+
+def search_services(queryset, query, prefix=False, name_only=False):
+    """
+    Filter ``queryset`` to services matching every term of ``query`` and
+    annotate ``relevance`` (text match, higher is better) and ``search_score``
+    (relevance boosted by the service rating).
+
+    ``prefix`` treats the last term as a prefix (autocomplete) and
+    ``name_only`` ignores descriptions. SQLite uses the FTS5 table, PostgreSQL
+    the GIN-indexed tsvector; other backends fall back to icontains.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none()
+
+    if connection.vendor == "sqlite":
+        match = " ".join(f'"{term}"' for term in terms) + ("*" if prefix else "")
+        if name_only:
+            match = f"name : ({match})"
+        queryset = queryset.filter(fts__document__match=match).annotate(relevance=-F("fts__rank"))
+    elif connection.vendor == "postgresql":
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        vector = SearchVector("name", weight="A", config="simple") + SearchVector("description", weight="B", config="simple")
+        # ":*" marks a prefix and ":A" restricts to the name weight, so one index serves every mode
+        last = len(terms) - 1
+        suffixes = [("*" if prefix and i == last else "") + ("A" if name_only else "") for i in range(len(terms))]
+        tsquery = SearchQuery(
+            " & ".join(f"{t}:{s}" if s else t for t, s in zip(terms, suffixes)), search_type="raw", config="simple"
+        )
+        queryset = queryset.annotate(search_vector=vector).filter(search_vector=tsquery).annotate(
+            relevance=SearchRank(vector, tsquery)
+        )
+    else:
+        for term in terms:
+            condition = Q(name__icontains=term)
+            if not name_only:
+                condition |= Q(description__icontains=term)
+            queryset = queryset.filter(condition)
+        queryset = queryset.annotate(relevance=Value(1.0))
+
+    return queryset.annotate(search_score=ExpressionWrapper(
+        F("relevance") * (1 + RATING_BOOST * F("rating")), output_field=FloatField()
+    ))
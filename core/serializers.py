@@ -1,8 +1,15 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+from django.utils import timezone
 from rest_framework import serializers
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.db.models import Avg
 from .models import Service, Cart, CartItem, Review, Order, OrderItem
+from .orders import TARGETS
+from .sparse import FastListSerializer, SparseFieldsMixin
+from .totals import order_line_total
 
 User = get_user_model()
 
@@ -61,33 +68,75 @@ class ClientProfileSerializer(serializers.ModelSerializer):
 
 
 # ---------------- Services ----------------
-class ServiceSerializer(serializers.ModelSerializer):
-    average_rating = serializers.SerializerMethodField()
+class ServiceSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    average_rating = serializers.FloatField(source="rating", read_only=True)
 
     class Meta:
         model = Service
         fields = "__all__"
+        list_serializer_class = FastListSerializer
+        read_only_fields = [
+            "rating", "rating_count", "rating_sum",
+            "rating_1", "rating_2", "rating_3", "rating_4", "rating_5",
+        ]
+
+
+class CatalogFilterSerializer(serializers.Serializer):
+    """Query params of the catalog facet filters."""
+    category = serializers.CharField(required=False)
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    min_rating = serializers.FloatField(min_value=0, max_value=5, required=False)
+
+    def validate_category(self, value):
+        categories = [c for c in value.split(",") if c]
+        unknown = set(categories) - {choice for choice, _ in Service.CATEGORY_CHOICES}
+        if unknown:
+            raise serializers.ValidationError(f"Unknown categories: {', '.join(sorted(unknown))}")
+        return categories
 
-    def get_average_rating(self, obj):
-        return obj.reviews.aggregate(Avg("rating"))["rating__avg"] or 0
+    def validate(self, attrs):
+        if attrs.get("min_price") is not None and attrs.get("max_price") is not None and attrs["min_price"] > attrs["max_price"]:
+            raise serializers.ValidationError("min_price must not exceed max_price")
+        return attrs
 
 
 # ---------------- Cart ----------------
-class CartItemSerializer(serializers.ModelSerializer):
+class CartItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     service = ServiceSerializer(read_only=True)
     service_id = serializers.PrimaryKeyRelatedField(queryset=Service.objects.all(), source="service", write_only=True)
+    line_total = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)  # cart_line_total()
 
     class Meta:
         model = CartItem
-        fields = ["id", "service", "service_id", "quantity"]
+        fields = ["id", "service", "service_id", "quantity", "line_total"]
+        extra_kwargs = {"quantity": {"min_value": 1}}  # remove a line instead of zeroing it
+        list_serializer_class = FastListSerializer
+
+class CartOperationSerializer(serializers.Serializer):
+    service_id = serializers.IntegerField()
+    delta = serializers.IntegerField(required=False)
+    quantity = serializers.IntegerField(required=False, min_value=0)
+
+    def validate(self, data):
+        if ("delta" in data) == ("quantity" in data):
+            raise serializers.ValidationError("Provide exactly one of 'delta' or 'quantity'")
+        return data
 
-class CartSerializer(serializers.ModelSerializer):
+class CartBatchSerializer(serializers.Serializer):
+    operations = CartOperationSerializer(many=True, allow_empty=False, max_length=200)
+
+class CartSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     items = CartItemSerializer(many=True)
+    # annotated by core.totals.with_cart_totals
+    item_count = serializers.IntegerField(read_only=True)
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
 
     class Meta:
         model = Cart
-        fields = ["id", "user", "items"]
+        fields = ["id", "user", "item_count", "subtotal", "items"]
         read_only_fields = ["user"]
+        list_serializer_class = FastListSerializer
 
     def create(self, validated_data):
         items_data = validated_data.pop("items")
@@ -98,31 +147,123 @@ class CartSerializer(serializers.ModelSerializer):
 
 
 # ---------------- Reviews ----------------
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = "__all__"
         read_only_fields = ("user", "created_at")
+        list_serializer_class = FastListSerializer
+        expandable_fields = {"service": (ServiceSerializer, {})}
 
 
 # ---------------- Orders ----------------
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     service = ServiceSerializer(read_only=True)
     service_id = serializers.PrimaryKeyRelatedField(queryset=Service.objects.all(), source="service", write_only=True)
+    line_total = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)  # order_line_total()
 
     class Meta:
         model = OrderItem
-        fields = ["id", "service", "service_id", "quantity", "price_at_purchase"]
+        fields = ["id", "service", "service_id", "quantity", "price_at_purchase", "line_total"]
+        list_serializer_class = FastListSerializer
 
-class OrderSerializer(serializers.ModelSerializer):
-    items = OrderItemSerializer(source='orderitem_set', many=True, read_only=True)
+class OrderItemSummarySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Order line without the embedded service (``?expand=items.service`` adds it), for order listings."""
+    service_name = serializers.CharField(source="service.name", read_only=True)
+    line_total = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = OrderItem
+        fields = ["id", "service", "service_name", "quantity", "price_at_purchase", "line_total"]
+        list_serializer_class = FastListSerializer
+        expandable_fields = {"service": (ServiceSerializer, {})}
+        read_only_fields = fields
+
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    items = OrderItemSummarySerializer(many=True, read_only=True)
+    item_count = serializers.IntegerField(read_only=True)  # annotated by core.totals.with_order_totals
 
     class Meta:
         model = Order
-        fields = ['id', 'user', 'status', 'total_amount', 'payment_status', 'created_at', 'items']
+        fields = [
+            'id', 'user', 'status', 'total_amount', 'item_count', 'payment_status', 'service_date', 'created_at', 'items',
+        ]
+        read_only_fields = ['service_date']  # moving a booking would need a new reservation
+        list_serializer_class = FastListSerializer
+
+    @staticmethod
+    def items_prefetch(full_service=False):
+        """Load every order's lines and line totals (with service names, or whole services) in one extra query."""
+        items = OrderItem.objects.select_related("service").order_by("id")
+        if not full_service:
+            items = items.only("id", "order_id", "quantity", "price_at_purchase", "service__id", "service__name")
+        return Prefetch("items", queryset=items.annotate(line_total=order_line_total()))
+
+
+class CheckoutSerializer(serializers.Serializer):
+    """Optional booking ``date`` for checkout: today (the default) up to BOOKING_WINDOW_DAYS ahead."""
+    date = serializers.DateField(required=False)
+
+    def validate_date(self, value):
+        today = timezone.localdate()
+        if not today <= value <= today + timedelta(days=settings.BOOKING_WINDOW_DAYS):
+            raise serializers.ValidationError(f"Choose a date within {settings.BOOKING_WINDOW_DAYS} days from today")
+        return value
+
+
+class OrderFilterSerializer(serializers.Serializer):
+    """Which orders a bulk status change applies to; all criteria must match."""
+    payment_status = serializers.ChoiceField(choices=[c for c, _ in Order.PAYMENT_CHOICES], required=False)
+    service_date = serializers.DateField(required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    user = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError("Provide at least one criterion")
+        return attrs
+
+
+class BulkOrderStatusSerializer(serializers.Serializer):
+    """The new ``status`` for the orders in ``ids`` or matching ``filter`` (exactly one of them)."""
+    status = serializers.ChoiceField(choices=TARGETS)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=settings.BULK_STATUS_LIMIT, required=False
+    )
+    filter = OrderFilterSerializer(required=False)
+
+    def validate(self, attrs):
+        if ("ids" in attrs) == ("filter" in attrs):
+            raise serializers.ValidationError("Provide exactly one of 'ids' or 'filter'")
+        return attrs
+
+
+# ---------------- Analytics ----------------
+class AnalyticsQuerySerializer(serializers.Serializer):
+    """?start=&end= (inclusive dates, at most a year apart) and ?top= for the sales report."""
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    top = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+    def validate(self, attrs):
+        end = attrs.get("end") or timezone.localdate()
+        start = attrs.get("start") or end - timedelta(days=29)
+        if start > end:
+            raise serializers.ValidationError("start must not be after end")
+        if (end - start).days >= 366:
+            raise serializers.ValidationError("the range is limited to 366 days")
+        return {**attrs, "start": start, "end": end}
 
 
 # ---------------- Payments ----------------
 class PaymentSerializer(serializers.Serializer):
     order_id = serializers.IntegerField()
     payment_method = serializers.ChoiceField(choices=['credit_card', 'bkash', 'nagad', 'cash'])
+
+class PaymentInitSerializer(serializers.Serializer):
+    """Body of the gateway create_order call; the optional fields fill in what the order lacks."""
+    order_id = serializers.IntegerField()
+    address = serializers.CharField(default="Dhaka")
+    phone = serializers.CharField(default="01700000000")
+    service = serializers.CharField(default="General Service")
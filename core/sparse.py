@@ -0,0 +1,196 @@
+# core/sparse.py
+from datetime import datetime
+from operator import attrgetter, itemgetter
+
+from django.db import models
+from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+from rest_framework.request import Request
+from rest_framework.settings import ISO_8601, api_settings
+
+# Field classes whose to_representation is a plain type conversion (None is handled separately).
+_PLAIN = {
+    serializers.CharField: str,
+    serializers.EmailField: str,
+    serializers.IntegerField: int,
+    serializers.FloatField: float,
+    serializers.BooleanField: bool,
+    serializers.ReadOnlyField: None,
+}
+
+
+def _datetime_converter(field):
+    """DateTimeField.to_representation with the output timezone looked up once per list, not per value."""
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    tz = getattr(field, "timezone", None) or field.default_timezone()
+    if tz is None or output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+
+    def convert(value):
+        if not isinstance(value, datetime) or value.tzinfo is None:
+            return field.to_representation(value)
+        text = value.astimezone(tz).isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    return convert
+
+
+def parse_paths(value):
+    """``"id,items.quantity,items.service"`` -> ``{"id": {}, "items": {"quantity": {}, "service": {}}}``."""
+    tree = {}
+    for path in value.split(","):
+        node = tree
+        for part in filter(None, path.strip().split(".")):
+            node = node.setdefault(part, {})
+    return tree
+
+
+def requested(request, path):
+    """Whether ``?fields=`` asks for the dotted ``path`` (everything is requested without it)."""
+    fields = request.query_params.get("fields") if request.method in ("GET", "HEAD") else None
+    node = parse_paths(fields) if fields else {}
+    for part in path.split("."):
+        if not node:  # no param, or a parent named without sub-fields: everything below
+            return True
+        if part not in node:
+            return False
+        node = node[part]
+    return True
+
+
+def expanded(request, path):
+    """Whether ``?expand=`` names the dotted ``path``."""
+    expand = request.query_params.get("expand") if request.method in ("GET", "HEAD") else None
+    node = parse_paths(expand or "")
+    for part in path.split("."):
+        if part not in node:
+            return False
+        node = node[part]
+    return True
+
+
+class SparseFieldsMixin:
+    """
+    ``?fields=id,name,items.quantity`` trims the output to those fields and
+    ``?expand=service`` swaps a relation for the serializer named in
+    ``Meta.expandable_fields``. Dotted paths reach nested serializers.
+
+    Only read requests are affected, so validation on writes still sees
+    every field.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        only, expand = self._sparse_spec()
+        expandable = getattr(self.Meta, "expandable_fields", {})
+        for name in expand:
+            if name in expandable:
+                serializer_class, kwargs = expandable[name]
+                fields[name] = serializer_class(read_only=True, **kwargs)
+        if only:
+            fields = {name: field for name, field in fields.items() if name in only}
+        for name, field in fields.items():
+            child = getattr(field, "child", field)
+            if isinstance(child, SparseFieldsMixin):
+                child._sparse = (only.get(name) if only else None, expand.get(name, {}))
+        return fields
+
+    def _sparse_spec(self):
+        if hasattr(self, "_sparse"):
+            return self._sparse
+        request = self.context.get("request")
+        # only the top-level serializer (or the child of a top-level many=True) reads the query string
+        top = self.parent is None or (self.parent is self.root and isinstance(self.root, serializers.ListSerializer))
+        if not top or not isinstance(request, Request) or request.method not in ("GET", "HEAD"):
+            return None, {}
+        fields, expand = request.query_params.get("fields"), request.query_params.get("expand")
+        return (parse_paths(fields) if fields else None), (parse_paths(expand) if expand else {})
+
+
+def plain_sources(serializer):
+    """``{field name: model attribute}`` for the fields whose value is a plain attribute of the instance."""
+    sources = {}
+    for name, field in serializer.fields.items():
+        if "." in field.source or field.source == "*":
+            continue
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+            sources[name] = serializer.Meta.model._meta.get_field(field.source).attname
+        elif not isinstance(field, (serializers.RelatedField, serializers.ManyRelatedField, serializers.BaseSerializer,
+                                    serializers.HiddenField, serializers.SerializerMethodField)):
+            sources[name] = field.source
+    return sources
+
+
+class FastListSerializer(serializers.ListSerializer):
+    """
+    ``many=True`` rendering that resolves each field's getter and converter
+    once per list instead of once per value. Plain model fields are read
+    with ``attrgetter`` (or ``itemgetter`` for ``values()`` rows) and
+    converted with a builtin; everything else goes through the regular
+    field. The output is identical to ListSerializer's.
+    """
+
+    def to_representation(self, data):
+        rows = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        if not rows:
+            return []
+        dicts = isinstance(rows[0], dict)
+        # a nested many=True field is one instance rendered once per parent row
+        plans = self.__dict__.setdefault("_plans", {})
+        plan = plans.get(dicts)
+        if plan is None:
+            plan = plans[dicts] = self._plan(dicts)
+        result = []
+        for row in rows:
+            item = {}
+            for name, get, convert in plan:
+                try:
+                    value = get(row)
+                except SkipField:
+                    continue
+                if value is None or (isinstance(value, PKOnlyObject) and value.pk is None):
+                    item[name] = None
+                else:
+                    item[name] = convert(value) if convert else value
+            result.append(item)
+        return result
+
+    def _plan(self, dicts):
+        readable = {name: field for name, field in self.child.fields.items() if not field.write_only}
+        sources = plain_sources(self.child)
+        if dicts and set(readable) - set(sources):
+            raise TypeError(f"{type(self.child).__name__} cannot render values() rows")
+        plan = []
+        for name, field in readable.items():
+            source = sources.get(name)
+            if source is None:
+                plan.append((name, field.get_attribute, field.to_representation))
+                continue
+            if isinstance(field, serializers.PrimaryKeyRelatedField):
+                convert = None  # the *_id column already holds the pk
+            elif type(field) is serializers.DateTimeField:
+                convert = _datetime_converter(field)
+            else:
+                convert = _PLAIN.get(type(field), field.to_representation)
+            plan.append((name, itemgetter(source) if dicts else attrgetter(source), convert))
+        return plan
+
+
+class ValuesListMixin:
+    """
+    Serve ``list`` from ``values()`` rows when every field the serializer
+    renders (after ``?fields=``) is a plain column, so no model instances
+    are built. The ordering fields come along for the keyset cursor.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action != "list":
+            return queryset
+        serializer = self.get_serializer()
+        readable = [name for name, field in serializer.fields.items() if not field.write_only]
+        sources = plain_sources(serializer)
+        if any(name not in sources for name in readable):
+            return queryset
+        ordering = [f.lstrip("-") for f in self.ordering_fields] if isinstance(self.ordering_fields, list) else []
+        return queryset.values(*dict.fromkeys([*(sources[name] for name in readable), *ordering, "id"]))
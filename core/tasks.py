@@ -0,0 +1,44 @@
+# core/tasks.py
+from django.conf import settings
+from django.core.mail import send_mail
+
+from .jobs import task
+from .models import Order
+
+
+def _order_summary(order):
+    lines = [
+        f"  {item.quantity} x {item.service.name} @ {item.price_at_purchase}"
+        for item in order.items.select_related("service").order_by("id")
+    ]
+    return "\n".join([*lines, f"Total: {order.total_amount} BDT"])
+
+
+def _recipient(order):
+    return order.email or order.user.email
+
+
+@task(queue="email")
+def send_order_confirmation(order_id):
+    order = Order.objects.select_related("user").filter(pk=order_id).first()
+    if order is None or not _recipient(order):
+        return
+    send_mail(
+        f"Order #{order.pk} received",
+        f"Thanks for your order.\n\n{_order_summary(order)}\n",
+        settings.DEFAULT_FROM_EMAIL,
+        [_recipient(order)],
+    )
+
+
+@task(queue="email")
+def send_payment_receipt(order_id):
+    order = Order.objects.select_related("user").filter(pk=order_id, payment_status="paid").first()
+    if order is None or not _recipient(order):
+        return
+    send_mail(
+        f"Payment received for order #{order.pk}",
+        f"We have received your payment.\n\n{_order_summary(order)}\n",
+        settings.DEFAULT_FROM_EMAIL,
+        [_recipient(order)],
+    )
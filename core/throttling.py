@@ -0,0 +1,95 @@
+# core/throttling.py
+import time
+
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket kept in the Django cache. A rate of ``"5/min"`` means a burst
+    of 5 requests, refilled at 5 tokens per minute. Rates come from
+    ``DEFAULT_THROTTLE_RATES[scope]`` like DRF's own throttles.
+
+    Reading and writing a bucket happens under a lock taken with the atomic
+    ``cache.add``, so a burst of concurrent requests cannot all spend the same
+    token. A request that cannot get the lock within ``lock_wait`` seconds is
+    refused. The buckets are only as shared as the cache: with the default
+    locmem cache every worker process has its own.
+    """
+    scope = None
+    cache = cache
+    lock_wait = 0.05
+    lock_timeout = 1  # a lock left behind by a crashed request expires on its own
+
+    def __init__(self):
+        num, period = api_settings.DEFAULT_THROTTLE_RATES[self.scope].split("/")
+        self.capacity = int(num)
+        self.refill_per_second = self.capacity / PERIODS[period[0]]
+        self.wait_time = None
+
+    def get_bucket(self, request, view):
+        """Identifier of the bucket this request draws from, or None to skip throttling."""
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        bucket = self.get_bucket(request, view)
+        if bucket is None:
+            return True
+        key = f"throttle:{self.scope}:{bucket}"
+        if not self._lock(key):
+            self.wait_time = self.lock_timeout
+            return False
+        try:
+            now = time.time()
+            tokens, updated = self.cache.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.refill_per_second)
+            if tokens < 1:
+                self.wait_time = (1 - tokens) / self.refill_per_second
+                return False
+            timeout = int(self.capacity / self.refill_per_second) + 1  # a full bucket needs no entry
+            self.cache.set(key, (tokens - 1, now), timeout)
+            return True
+        finally:
+            self.cache.delete(f"{key}:lock")
+
+    def _lock(self, key):
+        deadline = time.monotonic() + self.lock_wait
+        while not self.cache.add(f"{key}:lock", 1, self.lock_timeout):
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def wait(self):
+        return self.wait_time
+
+
+class IPThrottle(TokenBucketThrottle):
+    def get_bucket(self, request, view):
+        return self.get_ident(request)
+
+
+class UsernameThrottle(TokenBucketThrottle):
+    def get_bucket(self, request, view):
+        username = request.data.get("username") if hasattr(request.data, "get") else None
+        return str(username).strip().lower()[:150] if username else None
+
+
+class LoginIPThrottle(IPThrottle):
+    scope = "login_ip"
+
+
+class LoginUsernameThrottle(UsernameThrottle):
+    scope = "login_username"
+
+
+class RegisterIPThrottle(IPThrottle):
+    scope = "register_ip"
+
+
+class RegisterUsernameThrottle(UsernameThrottle):
+    scope = "register_username"
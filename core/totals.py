@@ -0,0 +1,46 @@
+# core/totals.py
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import OrderItem
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+ZERO = Value(0, output_field=MONEY)
+
+
+def cart_line_total(prefix=""):
+    """``quantity * service.price`` of a cart line, priced from the current catalog."""
+    return ExpressionWrapper(F(f"{prefix}quantity") * F(f"{prefix}service__price"), output_field=MONEY)
+
+
+def order_line_total(prefix=""):
+    """``quantity * price_at_purchase`` of an order line (the price snapshot taken at checkout)."""
+    return ExpressionWrapper(F(f"{prefix}quantity") * F(f"{prefix}price_at_purchase"), output_field=MONEY)
+
+
+def cart_totals(items):
+    """``{"lines", "item_count", "subtotal"}`` of a CartItem queryset in one aggregate query."""
+    return items.aggregate(
+        lines=Count("id"), item_count=Coalesce(Sum("quantity"), 0), subtotal=Coalesce(Sum(cart_line_total()), ZERO),
+    )
+
+
+def order_totals(items):
+    """``{"item_count", "total"}`` of an OrderItem queryset in one aggregate query."""
+    return items.aggregate(item_count=Coalesce(Sum("quantity"), 0), total=Coalesce(Sum(order_line_total()), ZERO))
+
+
+def with_cart_totals(carts):
+    """Annotate each cart with ``item_count`` and ``subtotal``, grouped over its lines in the same query."""
+    return carts.annotate(
+        item_count=Coalesce(Sum("items__quantity"), 0),
+        subtotal=Coalesce(Sum(cart_line_total("items__")), ZERO),
+    )
+
+
+def with_order_totals(orders):
+    """Annotate each order with ``item_count``; its total is the ``total_amount`` fixed at checkout."""
+    quantities = OrderItem.objects.filter(order=OuterRef("pk")).order_by().values("order").annotate(
+        n=Sum("quantity")
+    ).values("n")
+    return orders.annotate(item_count=Coalesce(Subquery(quantities), 0))
@@ -1,13 +1,19 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     RegisterView, LoginView, ProfileView, PromoteToAdminView, ClientProfileView,
     ServiceViewSet, CartViewSet, CartItemViewSet, ReviewViewSet, OrderViewSet,
-    CheckoutView, PaymentView, add_to_cart, remove_from_cart
+    CheckoutView, PaymentView, SalesAnalyticsView, add_to_cart, remove_from_cart
 )
 
+if settings.ASYNC_API:
+    from .async_views import AsyncCartViewSet as CartViewSet  # noqa: F811
+    from .async_views import AsyncOrderViewSet as OrderViewSet  # noqa: F811
+    from .async_views import AsyncServiceViewSet as ServiceViewSet  # noqa: F811
+
 router = DefaultRouter()
-router.register(r"services", ServiceViewSet)
+router.register(r"services", ServiceViewSet, basename="service")
 router.register(r"cart", CartViewSet, basename="cart")
 router.register(r"cart-items", CartItemViewSet, basename="cart-items")
 router.register(r"reviews", ReviewViewSet, basename="reviews")
@@ -28,6 +34,10 @@ urlpatterns = [
     # Checkout & Payment
     path("api/checkout/", CheckoutView.as_view(), name="checkout"),
     path("api/payment/", PaymentView.as_view(), name="payment"),
+    path("api/payment/", include("core.payments.urls")),
+
+    # Admin analytics
+    path("api/analytics/sales/", SalesAnalyticsView.as_view(), name="sales-analytics"),
 
     # DRF API router
     path("api/", include(router.urls)),
@@ -1,30 +1,55 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Avg
+from django.db import transaction
+from django.db.models import Count, F, Max, Prefetch, prefetch_related_objects
 from rest_framework import generics, permissions, viewsets, status, filters
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
-from .models import Service, Cart, CartItem, Review, Order, OrderItem
+from django.utils import timezone
+from .models import Service, Cart, CartItem, Review, Order
+from .analytics import payment_changed, sales_report
+from .capacity import CapacityError, order_changed
+from .cart import UnknownServiceError, apply_cart_operations
+from .catalog_cache import CatalogCacheMixin, invalidate_catalog_on_commit
+from .checkout import EmptyCartError, place_order
+from .orders import transition
+from .conditional import ConditionalGetMixin
+from .facets import CatalogFacetFilter, facet_counts
+from .metrics import SerializerTimingMixin
+from .pagination import KeysetPagination
+from .ratings import review_added, review_removed
+from .search import search_services
+from .tasks import send_payment_receipt
+from .totals import cart_line_total, with_cart_totals, with_order_totals
+from .sparse import ValuesListMixin, expanded, requested
+from .throttling import LoginIPThrottle, LoginUsernameThrottle, RegisterIPThrottle, RegisterUsernameThrottle
 from .serializers import (
     RegisterSerializer, LoginSerializer, UserSerializer,
     AdminPromotionSerializer, ClientProfileSerializer,
-    ServiceSerializer, CartSerializer, CartItemSerializer,
-    ReviewSerializer, OrderSerializer, PaymentSerializer
+    ServiceSerializer, CartSerializer, CartItemSerializer, CartBatchSerializer,
+    ReviewSerializer, OrderSerializer, CheckoutSerializer, PaymentSerializer, AnalyticsQuerySerializer,
+    BulkOrderStatusSerializer,
 )
 
 User = get_user_model()
 
 # ---------------- Auth ----------------
+# No authentication classes on these: Basic auth would hash a password before the throttles run.
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = RegisterSerializer
     permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+    throttle_classes = [RegisterIPThrottle, RegisterUsernameThrottle]
 
 class LoginView(generics.GenericAPIView):
     serializer_class = LoginSerializer
     permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+    throttle_classes = [LoginIPThrottle, LoginUsernameThrottle]
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -52,106 +77,234 @@ class ClientProfileView(generics.RetrieveUpdateAPIView):
         return self.request.user
 
 # ---------------- Services ----------------
-class ServiceViewSet(viewsets.ModelViewSet):
-    queryset = Service.objects.all().annotate(avg_rating=Avg("reviews__rating"))
+class ServiceViewSet(SerializerTimingMixin, ConditionalGetMixin, CatalogCacheMixin, ValuesListMixin,
+                     viewsets.ModelViewSet):
+    queryset = Service.objects.all().annotate(avg_rating=F("rating"))
     serializer_class = ServiceSerializer
     permission_classes = [permissions.AllowAny]
-    filter_backends = [filters.OrderingFilter]
+    filter_backends = [CatalogFacetFilter, filters.OrderingFilter]
     ordering_fields = ['avg_rating', 'price', 'name']
     ordering = ['-avg_rating']
+    pagination_class = KeysetPagination
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        # ?facets=1 adds the sidebar counts so page and facets come back in one response
+        if self.request.query_params.get("facets") in ("1", "true"):
+            response.data["facets"] = facet_counts(self.facet_queryset, self.facet_filters)
+        return response
 
     def create(self, request, *args, **kwargs):
         if not request.user.is_authenticated or getattr(request.user, "role", "client") != "admin":
             return Response({"detail": "Only admins can add services"}, status=403)
         return super().create(request, *args, **kwargs)
 
+    def get_validators(self, request, *args, **kwargs):
+        version, modified = self.catalog_state()
+        return f'W/"catalog-{version}"', modified
+
+    @action(detail=False)
+    def search(self, request):
+        """?q= full-text search; ordered by rating-boosted relevance unless ?ordering= says otherwise."""
+        def render():
+            self.ordering = ["-search_score"]
+            self.ordering_fields = [*self.ordering_fields, "search_score"]
+            queryset = search_services(self.get_queryset(), request.query_params.get("q", ""))
+            page = self.paginate_queryset(self.filter_queryset(queryset))
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return self._cached(request, render)
+
+    @action(detail=False)
+    def autocomplete(self, request):
+        """?q= prefix match on service names; the 10 best-rated first."""
+        def render():
+            matches = search_services(Service.objects.all(), request.query_params.get("q", ""), prefix=True, name_only=True)
+            # ordering by rating instead of relevance spares computing bm25 for every prefix match
+            return Response(list(matches.order_by("-rating", "id").values("id", "name", "rating")[:10]))
+        return self._cached(request, render)
+
 # ---------------- Cart ----------------
-class CartViewSet(viewsets.ModelViewSet):
+class CartViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     serializer_class = CartSerializer
     permission_classes = [IsAuthenticated]
     def get_queryset(self):
-        return Cart.objects.filter(user=self.request.user)
+        carts = Cart.objects.filter(user=self.request.user)
+        if requested(self.request, "item_count") or requested(self.request, "subtotal"):
+            carts = with_cart_totals(carts)
+        if not requested(self.request, "items"):
+            return carts
+        items = CartItem.objects.select_related("service").annotate(line_total=cart_line_total()).order_by("id")
+        return carts.prefetch_related(Prefetch("items", queryset=items))
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        cart = serializer.save(user=self.request.user)
+        serializer.instance = self.get_queryset().get(pk=cart.pk)  # with the totals
 
-class CartItemViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=["post"])
+    def batch(self, request):
+        """Apply [{"service_id", "delta"|"quantity"}, ...] atomically and return the cart."""
+        serializer = CartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            cart = apply_cart_operations(request.user, serializer.validated_data["operations"])
+        except UnknownServiceError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(CartSerializer(self.get_queryset().get(pk=cart.pk)).data)
+
+class CartItemViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     serializer_class = CartItemSerializer
     permission_classes = [IsAuthenticated]
     http_method_names = ["get", "delete", "patch"]
     def get_queryset(self):
-        return CartItem.objects.filter(cart__user=self.request.user)
+        return CartItem.objects.filter(cart__user=self.request.user).select_related("service").annotate(
+            line_total=cart_line_total()
+        )
+    def perform_update(self, serializer):
+        item = serializer.save()
+        item.line_total = self.get_queryset().values_list("line_total", flat=True).get(pk=item.pk)
 
 # ---------------- Reviews ----------------
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
+    ordering_fields = ['created_at']
+    ordering = ['-created_at']
     def get_queryset(self):
+        if expanded(self.request, "service"):
+            return Review.objects.select_related("service")
         return Review.objects.all()
+
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        review = serializer.save(user=self.request.user)
+        review_added(review.service_id, review.rating)
+        invalidate_catalog_on_commit()
+
+    # Updates and deletes re-read the review under a row lock: the counter deltas must start
+    # from the rating they replace, not from a copy a concurrent request may already have changed.
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.instance = get_object_or_404(Review.objects.select_for_update(), pk=serializer.instance.pk)
+        old_service_id, old_rating = serializer.instance.service_id, serializer.instance.rating
+        review = serializer.save()
+        if (old_service_id, old_rating) != (review.service_id, review.rating):
+            review_removed(old_service_id, old_rating)
+            review_added(review.service_id, review.rating)
+            invalidate_catalog_on_commit()
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        review = Review.objects.select_for_update().filter(pk=instance.pk).first()
+        if review is None:
+            return  # already deleted, and already taken out of the counters
+        review_removed(review.service_id, review.rating)
+        review.delete()
+        invalidate_catalog_on_commit()
 
 # ---------------- Orders ----------------
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(SerializerTimingMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
     http_method_names = ["get", "post", "patch"]
+    pagination_class = KeysetPagination
+    ordering_fields = ['created_at']
+    ordering = ['-created_at']
+    # bulk-status filter -> Order lookup
+    BULK_FILTERS = {
+        "payment_status": "payment_status", "service_date": "service_date",
+        "created_after": "created_at__gte", "created_before": "created_at__lt", "user": "user_id",
+    }
 
     def get_queryset(self):
         user = self.request.user
+        orders = Order.objects.order_by("-created_at")
+        if requested(self.request, "item_count"):
+            orders = with_order_totals(orders)
+        if requested(self.request, "items"):
+            orders = orders.prefetch_related(OrderSerializer.items_prefetch(expanded(self.request, "items.service")))
         if getattr(user, "role", "client") == "admin":
-            return Order.objects.all().order_by("-created_at")
-        return Order.objects.filter(user=user).order_by("-created_at")
+            return orders
+        return orders.filter(user=user)
+
+    def get_validators(self, request, *args, **kwargs):
+        return self._validators(self._validator_orders(kwargs).aggregate(count=Count("id"), modified=Max("updated_at")))
+
+    def _validator_orders(self, kwargs):
+        orders = self.get_queryset().prefetch_related(None).order_by()
+        return orders.filter(pk=kwargs["pk"]) if "pk" in kwargs else orders
+
+    @staticmethod
+    def _validators(stats):
+        if not stats["count"]:
+            return None, None
+        return f'W/"orders-{stats["count"]}-{stats["modified"].timestamp()}"', stats["modified"]
 
     def create(self, request, *args, **kwargs):
-        user = request.user
-        cart, _ = Cart.objects.get_or_create(user=user)
-        items = list(cart.items.select_related("service"))
-        if not items:
-            return Response({"detail": "Cart is empty"}, status=400)
-
-        order = Order.objects.create(user=user, status="pending", total_amount=0)
-        total = 0
-        for ci in items:
-            OrderItem.objects.create(
-                order=order,
-                service=ci.service,
-                quantity=ci.quantity,
-                price_at_purchase=ci.service.price,
-            )
-            total += ci.quantity * ci.service.price
-        order.total_amount = total
-        order.save()
-        cart.items.all().delete()
-        return Response(OrderSerializer(order).data, status=201)
+        return checkout(request)
 
     def partial_update(self, request, *args, **kwargs):
         if getattr(request.user, "role", "client") != "admin":
             return Response({"detail": "Only admins can update order status"}, status=403)
-        return super().partial_update(request, *args, **kwargs)
+        try:
+            return super().partial_update(request, *args, **kwargs)
+        except CapacityError as exc:  # reviving a cancelled or failed order whose day has filled up
+            return capacity_conflict(exc)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_status, old_total = serializer.instance.payment_status, serializer.instance.total_amount
+        order = serializer.save()
+        payment_changed(order, old_status, old_total)
+        order_changed(order)
+        if order.payment_status == "paid" != old_status:
+            send_payment_receipt.enqueue_on_commit(order_id=order.pk)
+        serializer.instance = self.get_queryset().get(pk=order.pk)  # lines and totals as the list shows them
+
+    @action(detail=False, methods=["post"], url_path="bulk-status")
+    def bulk_status(self, request):
+        """
+        Move pending orders, given as ``ids`` or a ``filter``, to ``status`` in one
+        UPDATE; at most BULK_STATUS_LIMIT per call (``more`` says to call again).
+        """
+        if getattr(request.user, "role", "client") != "admin":
+            return Response({"detail": "Only admins can update order status"}, status=403)
+        serializer = BulkOrderStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params, limit = serializer.validated_data, settings.BULK_STATUS_LIMIT
+        if "ids" in params:
+            orders = Order.objects.filter(pk__in=params["ids"])
+        else:
+            criteria = params["filter"]
+            orders = Order.objects.filter(
+                **{field: criteria[key] for key, field in self.BULK_FILTERS.items() if key in criteria}
+            )
+        changed = transition(orders, params["status"], limit)
+        return Response({
+            "status": params["status"], "updated": len(changed), "ids": changed,
+            "more": "filter" in params and len(changed) == limit,
+        })
 
 # ---------------- Checkout ----------------
+def checkout(request):
+    """Place the order for POST /checkout/ and POST /orders/ (optional ``date`` to book)."""
+    serializer = CheckoutSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    try:
+        order = place_order(request.user, serializer.validated_data.get("date"))
+    except EmptyCartError:
+        return Response({"detail": "Cart is empty"}, status=status.HTTP_400_BAD_REQUEST)
+    except CapacityError as exc:
+        return capacity_conflict(exc)
+    prefetch_related_objects([order], OrderSerializer.items_prefetch())
+    return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+
+def capacity_conflict(exc):
+    return Response({"detail": str(exc), "service_ids": sorted(exc.service_ids)}, status=status.HTTP_409_CONFLICT)
+
 class CheckoutView(APIView):
     permission_classes = [IsAuthenticated]
     def post(self, request):
-        user = request.user
-        cart = get_object_or_404(Cart, user=user)
-        if not cart.items.exists():
-            return Response({"detail": "Cart is empty"}, status=status.HTTP_400_BAD_REQUEST)
-
-        order = Order.objects.create(user=user, status="pending")
-        total = 0
-        for item in cart.items.all():
-            OrderItem.objects.create(
-                order=order,
-                service=item.service,
-                quantity=item.quantity,
-                price_at_purchase=item.service.price
-            )
-            total += item.quantity * item.service.price
-        order.total_amount = total
-        order.save()
-        cart.items.all().delete()
-        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+        return checkout(request)
 
 # ---------------- Payment ----------------
 class PaymentView(APIView):
@@ -160,29 +313,54 @@ class PaymentView(APIView):
         serializer = PaymentSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         order_id = serializer.validated_data['order_id']
-        order = get_object_or_404(Order, id=order_id, user=request.user)
-        order.payment_status = 'paid'
-        order.status = 'completed'
-        order.save()
+        order = get_object_or_404(with_order_totals(Order.objects), id=order_id, user=request.user)
+        if order.status == 'cancelled':
+            return Response({"detail": "Order is cancelled"}, status=status.HTTP_409_CONFLICT)
+        try:
+            with transaction.atomic():
+                # conditional on the statuses we read, so a repeated or concurrent payment is counted once
+                changed = Order.objects.filter(
+                    pk=order.pk, payment_status=order.payment_status, status=order.status
+                ).exclude(payment_status='paid').update(payment_status='paid', status='completed', updated_at=timezone.now())
+                if changed:
+                    old_status, order.payment_status, order.status = order.payment_status, 'paid', 'completed'
+                    order_changed(order)  # a failed payment released the booking; take it again
+                    payment_changed(order, old_status)
+                    send_payment_receipt.enqueue_on_commit(order_id=order.pk)
+                elif order.payment_status != 'paid':
+                    order.refresh_from_db()
+        except CapacityError as exc:
+            return capacity_conflict(exc)
+        prefetch_related_objects([order], OrderSerializer.items_prefetch())
         return Response({"detail": "Payment successful", "order": OrderSerializer(order).data})
 
+# ---------------- Analytics ----------------
+class SalesAnalyticsView(APIView):
+    """Admin sales report for ?start=&end= (default: the last 30 days), served from the daily rollups."""
+    permission_classes = [IsAuthenticated]
+    def get(self, request):
+        if getattr(request.user, "role", "client") != "admin":
+            return Response({"detail": "Only admins can view analytics"}, status=403)
+        serializer = AnalyticsQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        return Response(sales_report(params["start"], params["end"], params["top"]))
+
 # ---------------- Cart API ----------------
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def add_to_cart(request, service_id):
-    service = get_object_or_404(Service, id=service_id)
-    cart, _ = Cart.objects.get_or_create(user=request.user)
-    cart_item, created = CartItem.objects.get_or_create(cart=cart, service=service)
-    if not created:
-        cart_item.quantity += 1
-        cart_item.save()
+    try:
+        apply_cart_operations(request.user, [{"service_id": service_id, "delta": 1}])
+    except UnknownServiceError:
+        return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
     return Response({"detail": "Item added to cart"})
 
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def remove_from_cart(request, item_id):
-    cart_item = get_object_or_404(CartItem, id=item_id)
-    cart_item.delete()
+    cart_item = get_object_or_404(CartItem.objects.only("service_id"), id=item_id, cart__user=request.user)
+    apply_cart_operations(request.user, [{"service_id": cart_item.service_id, "quantity": 0}])
     return Response({"detail": "Item removed from cart"})
 
 
@@ -12,5 +12,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'household.settings')
+os.environ.setdefault('ASYNC_API', 'True')
 
 application = get_asgi_application()
@@ -1,10 +1,12 @@
 from django.contrib import admin
 from django.urls import path, include
+from core.metrics import MetricsView
 from core.views import home
 
 urlpatterns = [
     path("", home, name="home"),  
     path("admin/", admin.site.urls),
     path("register/", include("core.urls")),  
+    path("api/metrics/", MetricsView.as_view(), name="metrics"),
     # path("api/", include("core.api_urls")),  
 ]